@@ -1,16 +1,47 @@
 import random
+import sys
+
+NEIGHBORHOOD_SIZE = 125 * 124 // 2
+
+def set_seed(seed):
+    random.seed(seed)
+    if "numpy" in sys.modules:
+        sys.modules["numpy"].random.seed(seed)
 
 class MagicCube:
-    def __init__(self, cube=None):
+    def __init__(self, cube=None, initializer="random"):
         if cube is None:
             self.size = 5
-            self.cube = self.create_random_cube()
+            if initializer == "random":
+                self.cube = self.create_random_cube()
+            else:
+                from initializers import initial_numbers
+                self.cube = self.from_flat(initial_numbers(initializer)).cube
         else:
             self.size = 5
             self.cube = cube
         self.magic_number = 315
         self.value = self.calculate_value()
 
+    @classmethod
+    def from_flat(cls, numbers, size=5):
+        cube = [[[numbers[(i * size + j) * size + k] for k in range(size)]
+                 for j in range(size)]
+                 for i in range(size)]
+        return cls(cube)
+
+    def flatten(self):
+        return [self.cube[i][j][k]
+                for i in range(self.size)
+                for j in range(self.size)
+                for k in range(self.size)]
+
+    def canonical_form(self):
+        # Smallest flat state among every cube with the same value under the
+        # objective's symmetries; equal for equivalent cubes
+        from symmetry import canonical_form
+        return canonical_form(self.flatten())
+
     def create_random_cube(self):
         numbers = list(range(1, 126))
         random.shuffle(numbers)
@@ -138,15 +169,6 @@ class MagicCube:
         if self.value == 109:
             print("Congratulations! Magic cube solved!")
 
-    def save_state(self, filepath):
-        with open(filepath, "a") as file:
-            for row in range(self.size):
-                for col in range(self.size):
-                    for depth in range(self.size):
-                        file.write(str(self.cube[row][col][depth]) + " ")
-                file.write("\n")
-            file.write(f";\n")
-    
 if __name__ == "__main__":
     M = MagicCube()
     M.print_cube()
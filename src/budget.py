@@ -0,0 +1,73 @@
+import time
+
+
+class Budget:
+    def __init__(self, time_limit=None, max_evaluations=None, target_value=None, stagnation=None,
+                 progress=None, progress_interval=1.0):
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.target_value = target_value
+        self.stagnation = stagnation
+        # Optional callback, given snapshot() at most every progress_interval seconds
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.start()
+
+    def start(self):
+        self.start_time = time.monotonic()
+        self.deadline = None if self.time_limit is None else self.start_time + self.time_limit
+        self.evaluations = 0
+        self.steps = 0
+        self.best_value = None
+        self.last_improvement = 0
+        self.stop_reason = None
+        self.next_report = self.start_time + self.progress_interval
+        return self
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def update(self, value, evaluations=0, steps=1):
+        # Called once per main-loop step (or batch of `steps` steps that ends at
+        # `value`); returns True once the budget is used up
+        self.steps += steps
+        self.evaluations += evaluations
+        if self.best_value is None or value > self.best_value:
+            self.best_value = value
+            self.last_improvement = self.steps
+
+        if self.target_value is not None and value >= self.target_value:
+            self.stop_reason = "target"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.stop_reason = "evaluations"
+        elif self.stagnation is not None and self.steps - self.last_improvement >= self.stagnation:
+            self.stop_reason = "stagnation"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.stop_reason = "time"
+
+        if self.progress is not None and (self.stop_reason is not None
+                                          or time.monotonic() >= self.next_report):
+            self.next_report = time.monotonic() + self.progress_interval
+            self.progress(self.snapshot())
+        return self.stop_reason is not None
+
+    def exhausted(self):
+        return self.stop_reason is not None
+
+    def snapshot(self):
+        return {
+            "elapsed": self.elapsed(),
+            "steps": self.steps,
+            "evaluations": self.evaluations,
+            "best_value": self.best_value,
+            "stop_reason": self.stop_reason,
+        }
+
+    def describe(self):
+        limits = {
+            "time_limit": self.time_limit,
+            "max_evaluations": self.max_evaluations,
+            "target_value": self.target_value,
+            "stagnation": self.stagnation,
+        }
+        return {key: value for key, value in limits.items() if value is not None}
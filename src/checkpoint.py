@@ -0,0 +1,71 @@
+import os
+import pickle
+import random
+import sys
+import time
+
+
+def save_checkpoint(path, state):
+    # Write to a temporary file and rename so a crash never leaves a torn checkpoint
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def capture_rng():
+    state = {"random": random.getstate()}
+    if "numpy" in sys.modules:
+        state["numpy"] = sys.modules["numpy"].random.get_state()
+    return state
+
+
+def restore_rng(state):
+    random.setstate(state["random"])
+    if "numpy" in state:
+        import numpy as np
+        np.random.set_state(state["numpy"])
+
+
+class Checkpointer:
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def due(self):
+        return time.monotonic() - self.last >= self.interval
+
+    def save(self, state):
+        state["rng"] = capture_rng()
+        save_checkpoint(self.path, state)
+        self.last = time.monotonic()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def resume(path):
+    state = load_checkpoint(path)
+    if state["algorithm"] == "simulated_annealing":
+        from simulated_annealing import SimulatedAnnealing
+        return SimulatedAnnealing.resume(path)
+    if state["algorithm"] == "genetic_algorithm":
+        from genetic_algorithm import GeneticAlgorithm
+        return GeneticAlgorithm.resume(path)
+    raise ValueError(f"Unknown algorithm in checkpoint: {state['algorithm']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python checkpoint.py <checkpoint file>")
+        sys.exit(1)
+    resume(sys.argv[1])
@@ -0,0 +1,82 @@
+import os
+from trajectory import TrajectoryReader
+from timeline import Timeline, build_timeline
+
+SYNC_MODES = ("progress", "time")
+
+
+class Comparison:
+    # Several trajectories on one shared axis of `len(self)` ticks. With
+    # sync="progress" a tick shows every run at the same fraction of its
+    # length; with sync="time" at the same number of seconds since its first
+    # state, runs that already finished staying on their last state. States
+    # are read through each file's chunk index on demand, so comparing N runs
+    # costs N chunk caches rather than N loaded trajectories.
+    def __init__(self, paths, sync="progress"):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"Unknown sync mode: {sync}")
+        self.sync = sync
+        self.names = [os.path.basename(path) for path in paths]
+        self.readers = []
+        try:
+            for path in paths:
+                self.readers.append(TrajectoryReader(path))
+                if len(self.readers[-1]) == 0:
+                    raise ValueError(f"{os.path.basename(path)} has no states")
+        except Exception:
+            self.close()
+            raise
+        self.length = max((len(reader) for reader in self.readers), default=0)
+        self.duration = max((reader.duration() for reader in self.readers), default=0.0)
+        self.timelines = None
+
+    def __len__(self):
+        return self.length
+
+    def fraction(self, tick):
+        return tick / max(1, self.length - 1)
+
+    def index(self, reader, fraction):
+        if self.sync == "progress":
+            return round(fraction * (len(reader) - 1))
+        return reader.index_at_time(reader.start_time() + fraction * self.duration)
+
+    def tick(self, reader, index):
+        # Where a state of `reader` falls on the shared axis
+        if self.sync == "progress":
+            fraction = index / max(1, len(reader) - 1)
+        elif self.duration:
+            fraction = (reader.time_of(index) - reader.start_time()) / self.duration
+        else:
+            fraction = 0.0
+        return round(fraction * (self.length - 1))
+
+    def __getitem__(self, tick):
+        # (index, cells, value) of every run at `tick`
+        fraction = self.fraction(tick)
+        frame = []
+        for reader in self.readers:
+            index = self.index(reader, fraction)
+            frame.append((index, reader.cells(index), reader.value(index)))
+        return frame
+
+    def curves(self, buckets=560):
+        # Per run, (tick, best value) for each bucket of its value timeline,
+        # and one Timeline holding every run's events in ticks. The per-run
+        # timelines are built once, in one streaming pass over each file, and
+        # reused when the sync mode changes.
+        if self.timelines is None:
+            self.timelines = [build_timeline(reader, buckets) for reader in self.readers]
+        curves = []
+        events = []
+        for name, reader, timeline in zip(self.names, self.readers, self.timelines):
+            curves.append([(self.tick(reader, bucket * timeline.bucket_size), int(high))
+                           for bucket, high in enumerate(timeline.high)])
+            events.extend((self.tick(reader, index), kind, f"{name}: {label}")
+                          for index, kind, label in timeline.events)
+        events.sort(key=lambda event: event[0])
+        return curves, Timeline(self.length, 1, [], [], events)
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
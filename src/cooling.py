@@ -0,0 +1,171 @@
+import math
+import random
+from delta import line_sums, random_swap, swap_delta
+
+
+class CoolingSchedule:
+    # `cool` is called once per block of SA iterations with the block's stats
+    # and returns the next temperature. `effective` maps the schedule's
+    # temperature to the T used in e^(ΔE/T). `start` resets any per-run state
+    # at the beginning of a fresh run.
+    start_scale = 1.0
+
+    def start(self):
+        pass
+
+    def effective(self, temperature, initial_temp):
+        return temperature
+
+    def cool(self, temperature, stats):
+        raise NotImplementedError
+
+    def describe(self):
+        return type(self).__name__
+
+
+class LegacySchedule(CoolingSchedule):
+    # The original cascade: slower cooling as the best value rises, faster on
+    # long plateaus, and a sharper acceptance curve while T is still high
+    start_scale = 0.01
+
+    def __init__(self, cooling_rate=0.99995):
+        self.cooling_rate = cooling_rate
+
+    def effective(self, temperature, initial_temp):
+        if temperature > initial_temp * 0.8:
+            return temperature * 0.01
+        elif temperature > initial_temp * 0.4:
+            return temperature * 0.05
+        return temperature
+
+    def cool(self, temperature, stats):
+        if stats.plateau_count > 10000:
+            return temperature * (self.cooling_rate ** 2)
+        elif stats.best_value > 80:
+            return temperature * (self.cooling_rate ** 0.1)
+        elif stats.best_value > 60:
+            return temperature * (self.cooling_rate ** 0.25)
+        elif stats.best_value > 40:
+            return temperature * (self.cooling_rate ** 0.5)
+        return temperature * self.cooling_rate
+
+    def describe(self):
+        return f"legacy({self.cooling_rate})"
+
+
+class GeometricSchedule(CoolingSchedule):
+    def __init__(self, alpha=0.999):
+        self.alpha = alpha
+
+    def cool(self, temperature, stats):
+        return temperature * self.alpha
+
+    def describe(self):
+        return f"geometric({self.alpha})"
+
+
+class LundyMeesSchedule(CoolingSchedule):
+    def __init__(self, beta=1e-3):
+        self.beta = beta
+
+    def cool(self, temperature, stats):
+        return temperature / (1 + self.beta * temperature)
+
+    def describe(self):
+        return f"lundy_mees({self.beta})"
+
+
+class AdaptiveSchedule(CoolingSchedule):
+    # Steers the acceptance rate of worsening proposals towards a target that
+    # starts at `target_rate` and decays, so the search still freezes eventually
+    def __init__(self, target_rate=0.3, final_rate=0.001, decay=0.999, step=0.95):
+        self.target_rate = target_rate
+        self.final_rate = final_rate
+        self.decay = decay
+        self.step = step
+        self.start()
+
+    def start(self):
+        self.current_rate = self.target_rate
+
+    def cool(self, temperature, stats):
+        if stats.acceptance_rate > self.current_rate:
+            temperature *= self.step
+        else:
+            temperature /= self.step
+        self.current_rate = max(self.final_rate, self.current_rate * self.decay)
+        return temperature
+
+    def describe(self):
+        return f"adaptive({self.target_rate}, {self.final_rate}, {self.decay}, {self.step})"
+
+
+class ReheatPolicy:
+    # `temperature` returns the reheat temperature, or None to keep cooling
+    def temperature(self, initial_temp, best_value):
+        raise NotImplementedError
+
+    def describe(self):
+        return type(self).__name__
+
+
+class NoReheat(ReheatPolicy):
+    def temperature(self, initial_temp, best_value):
+        return None
+
+    def describe(self):
+        return "none"
+
+
+class ConstantReheat(ReheatPolicy):
+    def __init__(self, fraction=0.5):
+        self.fraction = fraction
+
+    def temperature(self, initial_temp, best_value):
+        return initial_temp * self.fraction
+
+    def describe(self):
+        return f"constant({self.fraction})"
+
+
+class BestValueReheat(ReheatPolicy):
+    # The original ladder: reheat less the better the best state already is
+    def temperature(self, initial_temp, best_value):
+        if best_value < 40:
+            return initial_temp * 0.95
+        elif best_value < 60:
+            return initial_temp * 0.8
+        elif best_value < 80:
+            return initial_temp * 0.6
+        return initial_temp * 0.4
+
+    def describe(self):
+        return "best_value"
+
+
+class BlockStats:
+    def __init__(self):
+        self.best_value = 0
+        self.plateau_count = 0
+        self.worsening = 0
+        self.accepted_worsening = 0
+
+    @property
+    def acceptance_rate(self):
+        if self.worsening == 0:
+            return 1.0
+        return self.accepted_worsening / self.worsening
+
+
+def calibrate_initial_temperature(flat, acceptance=0.8, samples=2000, rng=random):
+    # Pick T so that an average worsening swap from `flat` is accepted with
+    # probability `acceptance`: exp(-mean_loss / T) = acceptance
+    sums = line_sums(flat)
+    losses = []
+    for _ in range(samples):
+        a, b = random_swap(rng)
+        delta = swap_delta(flat, sums, a, b)
+        if delta < 0:
+            losses.append(-delta)
+    mean_loss = sum(losses) / len(losses) if losses else 1.0
+    return -mean_loss / math.log(acceptance)
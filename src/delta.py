@@ -0,0 +1,88 @@
+import random
+
+SIZE = 5
+CELLS = SIZE ** 3
+MAGIC_NUMBER = 315
+
+
+def cell(i, j, k):
+    return (i * SIZE + j) * SIZE + k
+
+
+def build_lines():
+    # Same lines, in the same order, as MagicCube.calculate_value. That includes
+    # its plane diagonals as written (some counted twice), so delta scores always
+    # agree with the full objective.
+    n = SIZE
+    lines = []
+    for i in range(n):
+        for j in range(n):
+            lines.append([cell(i, j, k) for k in range(n)])
+            lines.append([cell(i, k, j) for k in range(n)])
+            lines.append([cell(k, i, j) for k in range(n)])
+    for i in range(n):
+        lines.append([cell(i, j, j) for j in range(n)])
+        lines.append([cell(i, j, n - 1 - j) for j in range(n)])
+        lines.append([cell(i, j, j) for j in range(n)])
+        lines.append([cell(i, n - 1 - j, j) for j in range(n)])
+        lines.append([cell(j, i, j) for j in range(n)])
+        lines.append([cell(j, i, n - 1 - j) for j in range(n)])
+    lines.append([cell(i, i, i) for i in range(n)])
+    lines.append([cell(i, i, n - 1 - i) for i in range(n)])
+    lines.append([cell(i, n - 1 - i, i) for i in range(n)])
+    lines.append([cell(i, n - 1 - i, n - 1 - i) for i in range(n)])
+    return tuple(tuple(line) for line in lines)
+
+
+LINES = build_lines()
+CELL_LINES = tuple(tuple(n for n, line in enumerate(LINES) if c in line) for c in range(CELLS))
+CELL_LINE_SETS = tuple(frozenset(lines) for lines in CELL_LINES)
+# Largest possible drop in value from a single swap
+MAX_LOSS = 2 * max(len(lines) for lines in CELL_LINES)
+
+
+def line_sums(flat):
+    return [sum(flat[c] for c in line) for line in LINES]
+
+
+def score(sums):
+    return sum(1 for s in sums if s == MAGIC_NUMBER)
+
+
+def random_swap(rng=random):
+    a = rng.randrange(CELLS)
+    b = rng.randrange(CELLS - 1)
+    if b >= a:
+        b += 1
+    return a, b
+
+
+def swap_delta(flat, sums, a, b):
+    diff = flat[b] - flat[a]
+    if diff == 0:
+        return 0
+    delta = 0
+    lines_b = CELL_LINE_SETS[b]
+    for n in CELL_LINES[a]:
+        if n not in lines_b:
+            s = sums[n]
+            delta += (s + diff == MAGIC_NUMBER) - (s == MAGIC_NUMBER)
+    lines_a = CELL_LINE_SETS[a]
+    for n in CELL_LINES[b]:
+        if n not in lines_a:
+            s = sums[n]
+            delta += (s - diff == MAGIC_NUMBER) - (s == MAGIC_NUMBER)
+    return delta
+
+
+def apply_swap(flat, sums, a, b):
+    diff = flat[b] - flat[a]
+    lines_b = CELL_LINE_SETS[b]
+    for n in CELL_LINES[a]:
+        if n not in lines_b:
+            sums[n] += diff
+    lines_a = CELL_LINE_SETS[a]
+    for n in CELL_LINES[b]:
+        if n not in lines_a:
+            sums[n] -= diff
+    flat[a], flat[b] = flat[b], flat[a]
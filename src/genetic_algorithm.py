@@ -1,21 +1,21 @@
 import numpy as np
 import time
-import matplotlib.pyplot as plt
+from multiprocessing import Pipe, Process
 from typing import List
-from MagicCube import MagicCube
-import os
+from MagicCube import MagicCube, set_seed
+from trajectory import TrajectoryWriter
+from run_catalog import record_run
+from metrics import MetricRecorder
+from plotting import finish_figure, new_figure, plot_series
+from checkpoint import Checkpointer, load_checkpoint, restore_rng
+from shared_state import StatePool, detach
 
-class GeneticAlgorithm:
-    def __init__(self, population_size=100, iterations=100):
+class GeneticOperators:
+    def __init__(self, population_size=100, mutation_rate=0.1, dedupe=False, elite_fraction=0.25):
         self.population_size = population_size
-        self.mutation_rate = 0.1
-        self.iterations = iterations
-        self.avg_fitness_history = []
-        self.best_fitness_history = []
-        self.execution_time = None
-        self.initial_fitness = None
-        self.final_fitness = None
-        self.filepath = self.make_file("geneticalgorithm")
+        self.mutation_rate = mutation_rate
+        self.dedupe = dedupe
+        self.elite_fraction = elite_fraction
 
     def calculate_fitness(self, population: List[MagicCube]) -> List[float]:
         return [cube.value for cube in population]
@@ -24,7 +24,9 @@ class GeneticAlgorithm:
         population_with_fitness = list(zip(fitness, population))
         population_with_fitness.sort(key=lambda x: x[0], reverse=True)
         sorted_population = [cube for _, cube in population_with_fitness]
-        elite_size = max(2, self.population_size // 4)
+        if self.dedupe:
+            sorted_population = self.distinct(sorted_population)
+        elite_size = max(2, int(self.population_size * self.elite_fraction))
         elite = sorted_population[:elite_size]
         new_population = []
         new_population.extend(elite)
@@ -35,6 +37,18 @@ class GeneticAlgorithm:
             
         return new_population
 
+    def distinct(self, population: List[MagicCube]) -> List[MagicCube]:
+        # Drops cubes that are symmetric copies of an earlier one, so the elite
+        # is not filled with the same state in different orientations
+        seen = set()
+        unique = []
+        for cube in population:
+            form = cube.canonical_form()
+            if form not in seen:
+                seen.add(form)
+                unique.append(cube)
+        return unique
+
     def crossover(self, population: List[MagicCube]) -> List[MagicCube]:
         children = []
         elite_size = max(2, self.population_size // 10)
@@ -71,12 +85,87 @@ class GeneticAlgorithm:
                 mutated.append(cube)
         return mutated
 
-    def plot_progress(self):
-        fig = plt.figure(figsize=(15, 10))
+    def evolve(self, population: List[MagicCube], fitness: List[float]) -> List[MagicCube]:
+        population = self.selection(population, fitness)
+        population = self.crossover(population)
+        return self.mutation(population)
+
+def island_worker(conn, seed, island_size, mutation_rate, dedupe, elite_fraction, initializer, init_state):
+    # One island of the island model. Each ("evolve", generations, immigrants,
+    # emigrants) command replaces the island's worst individuals with the
+    # cubes in the `immigrants` StateHandles, runs `generations` generations,
+    # writes its top cubes to the `emigrants` handles and replies with the
+    # per-generation best/average fitness and the best cube of each generation.
+    if seed is not None:
+        set_seed(seed)
+    operators = GeneticOperators(island_size, mutation_rate, dedupe, elite_fraction)
+    population = [MagicCube(init_state)]
+    for _ in range(island_size - 1):
+        population.append(MagicCube(initializer=initializer))
+
+    while True:
+        command = conn.recv()
+        if command[0] == "stop":
+            break
+        _, generations, immigrants, emigrants = command
+        if immigrants:
+            population.sort(key=lambda cube: cube.value)
+            population[:len(immigrants)] = [handle.cube() for handle in immigrants]
+
+        best_history, avg_history, best_cubes = [], [], []
+        for _ in range(generations):
+            fitness = operators.calculate_fitness(population)
+            best = max(fitness)
+            best_history.append(best)
+            avg_history.append(sum(fitness) / len(fitness))
+            best_cubes.append(population[fitness.index(best)].cube)
+            if best == 109:
+                break
+            population = operators.evolve(population, fitness)
+
+        population.sort(key=lambda cube: cube.value, reverse=True)
+        for handle, cube in zip(emigrants, population):
+            handle.write(cube)
+        conn.send((best_history, avg_history, best_cubes))
+    detach()
+    conn.close()
+
+class GeneticAlgorithm(GeneticOperators):
+    def __init__(self, population_size=100, iterations=100, seed=None,
+                 checkpoint_interval=None, checkpoint_path=None, filepath=None, budget=None,
+                 dedupe=False, initializer="random", mutation_rate=0.1, elite_fraction=0.25):
+        super().__init__(population_size, mutation_rate, dedupe, elite_fraction)
+        self.initializer = initializer
+        self.seed = seed
+        self.budget = budget
+        self.iterations = iterations
+        self.avg_fitness_history = MetricRecorder()
+        self.best_fitness_history = MetricRecorder()
+        self.execution_time = None
+        self.initial_fitness = None
+        self.final_fitness = None
+        # None: a new save file is reserved when a run starts writing
+        self.filepath = filepath
+        self.checkpoint_interval = checkpoint_interval
+        # None: the save file's path plus ".ckpt"
+        self.checkpoint_path = checkpoint_path
 
-        ax1 = plt.subplot(2, 1, 1)
-        ax1.plot(self.best_fitness_history, label='Best Value', color='blue')
-        ax1.plot(self.avg_fitness_history, label='Population Average', color='red')
+    def params(self):
+        return {
+            "population_size": self.population_size,
+            "iterations": self.iterations,
+            "mutation_rate": self.mutation_rate,
+            "elite_fraction": self.elite_fraction,
+            "dedupe": self.dedupe,
+            "initializer": self.initializer,
+        }
+
+    def plot_progress(self, output=None):
+        fig = new_figure((15, 10), output)
+
+        ax1 = fig.add_subplot(2, 1, 1)
+        plot_series(ax1, *self.best_fitness_history.series(), label='Best Value', color='blue')
+        plot_series(ax1, *self.avg_fitness_history.series(), label='Population Average', color='red')
         ax1.set_xlabel('Generation')
         ax1.set_ylabel('Fitness')
         ax1.set_title('Magic Cube Optimization Progress')
@@ -92,30 +181,53 @@ class GeneticAlgorithm:
             f'Final Value: {self.final_fitness}/109'
         )
         
-        plt.figtext(0.15, 0.15, info_text, bbox=dict(facecolor='white', alpha=0.8, edgecolor='gray'), fontsize=10, family='monospace')
+        fig.text(0.15, 0.15, info_text, bbox=dict(facecolor='white', alpha=0.8, edgecolor='gray'), fontsize=10, family='monospace')
 
-        ax2 = plt.subplot(2, 1, 2)
+        ax2 = fig.add_subplot(2, 1, 2)
         ax2.axis('off')
 
-        plt.tight_layout()
-        plt.show()
+        finish_figure(fig, output)
 
-    def run(self, init_state: MagicCube):
+    def run(self, init_state: MagicCube, resume_state=None, plot=True):
         start_time = time.time()
-        self.initial_fitness = init_state.value
-        
-        population = [init_state]
-        for _ in range(self.population_size - 1):
-            population.append(MagicCube())
+        if resume_state is None:
+            if self.seed is not None:
+                set_seed(self.seed)
+            self.trajectory = TrajectoryWriter(self.filepath, name="geneticalgorithm")
+            self.initial_fitness = init_state.value
+            
+            population = [init_state]
+            for _ in range(self.population_size - 1):
+                population.append(MagicCube(initializer=self.initializer))
 
-        best_fitness = init_state.value
-        best_cube = init_state
-        
-        print(f"\nInitial cube (fitness: {best_fitness}/109):")
-        init_state.print_cube()
-        print("\nStarting optimization...\n")
+            best_fitness = init_state.value
+            best_cube = init_state
+            first_generation = 0
+            
+            print(f"\nInitial cube (fitness: {best_fitness}/109):")
+            init_state.print_cube()
+            print("\nStarting optimization...\n")
+        else:
+            self.trajectory = TrajectoryWriter(self.filepath, length=resume_state["trajectory_length"])
+            start_time -= resume_state["elapsed"]
+            self.initial_fitness = init_state.value
+            population = [MagicCube(cube) for cube in resume_state["population"]]
+            best_cube = MagicCube(resume_state["best"])
+            best_fitness = best_cube.value
+            first_generation = resume_state["generation"]
+            self.best_fitness_history = resume_state["best_fitness_history"]
+            self.avg_fitness_history = resume_state["avg_fitness_history"]
+            restore_rng(resume_state["rng"])
+
+        self.filepath = self.trajectory.filepath
+        checkpointer = None
+        if self.checkpoint_interval is not None:
+            checkpointer = Checkpointer(self.checkpoint_path or self.filepath + ".ckpt", self.checkpoint_interval)
+
+        if self.budget is not None:
+            self.budget.start()
         
-        for generation in range(self.iterations):
+        for generation in range(first_generation, self.iterations):
             fitness = self.calculate_fitness(population)
             current_best = max(fitness)
             avg_fitness = sum(fitness) / len(fitness)
@@ -130,39 +242,168 @@ class GeneticAlgorithm:
             if best_fitness == 109:
                 print(f"\nSolution found at generation {generation + 1}")
                 break
+            if self.budget is not None and self.budget.update(best_fitness, len(population)):
+                print(f"\nStopped by budget at generation {generation + 1}: {self.budget.stop_reason}")
+                break
                 
-            population = self.selection(population, fitness)
-            population = self.crossover(population)
-            population = self.mutation(population)
+            population = self.evolve(population, fitness)
+
+            self.trajectory.append(best_cube)
 
-            best_cube.save_state(self.filepath)
+            if checkpointer is not None and checkpointer.due():
+                self.trajectory.flush()
+                checkpointer.save({
+                    "algorithm": "genetic_algorithm",
+                    "params": self.params(),
+                    "seed": self.seed,
+                    "filepath": self.filepath,
+                    "checkpoint_interval": self.checkpoint_interval,
+                    "trajectory_length": len(self.trajectory),
+                    "elapsed": time.time() - start_time,
+                    "initial_state": init_state.cube,
+                    "generation": generation + 1,
+                    "population": [cube.cube for cube in population],
+                    "best": best_cube.cube,
+                    "best_fitness_history": self.best_fitness_history,
+                    "avg_fitness_history": self.avg_fitness_history,
+                })
 
+        self.trajectory.close()
+        if checkpointer is not None:
+            checkpointer.remove()
         self.execution_time = time.time() - start_time
         self.final_fitness = best_fitness
+        record_run("genetic_algorithm", self.filepath, self.params(), self.seed, start_time,
+                   start_time + self.execution_time, self.initial_fitness, best_fitness,
+                   len(self.best_fitness_history), best_cube)
         
         print(f"\nExecution time: {self.execution_time:.2f} seconds")
         print(f"Final best fitness: {best_fitness}/109")
         print("\nFinal best cube structure:")
         best_cube.print_cube()
         
-        self.plot_progress()
+        if plot:
+            self.plot_progress()
         
         return best_cube, best_fitness
-    
-    def make_file(self, name):
-        directory = ".\\save_file"
-        os.makedirs(directory, exist_ok=True)
-        
-        counter = 1
-        while True:
-            filename = f"{name}{counter}.txt"
-            filepath = os.path.join(directory, filename)
-            
-            if not os.path.exists(filepath):
-                break
-            counter += 1
-        
-        return filepath
+
+    def run_islands(self, init_state: MagicCube, islands=4, migration_interval=10, migrants=2, plot=True):
+        # Island model: `islands` subpopulations of population_size // islands
+        # evolve in worker processes and every `migration_interval` generations
+        # each island's top `migrants` replace the worst of the next island (ring)
+        start_time = time.time()
+        if self.seed is not None:
+            set_seed(self.seed)
+        self.trajectory = TrajectoryWriter(self.filepath, name="geneticalgorithm")
+        self.filepath = self.trajectory.filepath
+        self.initial_fitness = init_state.value
+        island_size = max(2, self.population_size // islands)
+        migrants = min(migrants, island_size)
+
+        # Migrants travel through shared memory rather than the pipes: in each
+        # epoch an island writes its top cubes to its slots of one bank and
+        # its neighbour reads them in the next epoch, while the other bank is
+        # being written
+        pool = StatePool(max(1, 2 * islands * migrants))
+        banks = [[pool.handles((bank * islands + island) * migrants,
+                               (bank * islands + island + 1) * migrants)
+                  for island in range(islands)]
+                 for bank in range(2)]
+
+        workers = []
+        for island in range(islands):
+            parent_conn, child_conn = Pipe()
+            seed = None if self.seed is None else self.seed * islands + island
+            process = Process(target=island_worker, daemon=True,
+                              args=(child_conn, seed, island_size, self.mutation_rate, self.dedupe,
+                                    self.elite_fraction, self.initializer, init_state.cube))
+            process.start()
+            child_conn.close()
+            workers.append((parent_conn, process))
+
+        print(f"\nInitial cube (fitness: {init_state.value}/109):")
+        init_state.print_cube()
+        print(f"\nStarting optimization on {islands} islands of {island_size}...\n")
+
+        if self.budget is not None:
+            self.budget.start()
+
+        best_fitness = init_state.value
+        best_cube = init_state
+        immigrants = [[] for _ in range(islands)]
+        generation = 0
+        epoch = 0
+        try:
+            while generation < self.iterations:
+                generations = min(migration_interval, self.iterations - generation)
+                emigrants = banks[epoch % 2]
+                for (conn, _), incoming, outgoing in zip(workers, immigrants, emigrants):
+                    conn.send(("evolve", generations, incoming, outgoing))
+                replies = [conn.recv() for conn, _ in workers]
+
+                # Islands that hit 109 stop early; merge only the generations all ran
+                ran = min(len(reply[0]) for reply in replies)
+                for step in range(ran):
+                    bests = [reply[0][step] for reply in replies]
+                    current_best = max(bests)
+                    self.best_fitness_history.append(current_best)
+                    self.avg_fitness_history.append(sum(reply[1][step] for reply in replies) / islands)
+                    if current_best > best_fitness:
+                        best_fitness = current_best
+                        best_cube = MagicCube(replies[bests.index(current_best)][2][step])
+                    self.trajectory.append(best_cube)
+                generation += ran
+                epoch += 1
+
+                immigrants = [emigrants[island - 1] for island in range(islands)]
+
+                if best_fitness == 109:
+                    print(f"\nSolution found at generation {generation}")
+                    break
+                if self.budget is not None and self.budget.update(best_fitness, ran * island_size * islands, ran):
+                    print(f"\nStopped by budget at generation {generation}: {self.budget.stop_reason}")
+                    break
+        finally:
+            # A crashed worker's pipe is broken; that must not hide the error
+            # being raised or keep the others from being joined and the pool
+            # from being unlinked
+            for conn, process in workers:
+                try:
+                    conn.send(("stop",))
+                except OSError:
+                    pass
+                conn.close()
+            try:
+                for _, process in workers:
+                    process.join()
+            finally:
+                pool.close()
+
+        self.trajectory.close()
+        self.execution_time = time.time() - start_time
+        self.final_fitness = best_fitness
+        params = dict(self.params(), islands=islands, migration_interval=migration_interval, migrants=migrants)
+        record_run("genetic_algorithm", self.filepath, params, self.seed, start_time,
+                   start_time + self.execution_time, self.initial_fitness, best_fitness,
+                   len(self.best_fitness_history), best_cube)
+
+        print(f"\nExecution time: {self.execution_time:.2f} seconds")
+        print(f"Final best fitness: {best_fitness}/109")
+        print("\nFinal best cube structure:")
+        best_cube.print_cube()
+
+        if plot:
+            self.plot_progress()
+
+        return best_cube, best_fitness
+
+    @classmethod
+    def resume(cls, checkpoint_path):
+        state = load_checkpoint(checkpoint_path)
+        ga = cls(**state["params"], seed=state["seed"], filepath=state["filepath"],
+                 checkpoint_interval=state["checkpoint_interval"], checkpoint_path=checkpoint_path)
+        print(f"Resuming {state['filepath']} at generation {state['generation']}")
+        return ga.run(MagicCube(state["initial_state"]), resume_state=state)
 
 def main():
     ga = GeneticAlgorithm(
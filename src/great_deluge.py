@@ -0,0 +1,138 @@
+from MagicCube import MagicCube, set_seed
+from trajectory import TrajectoryWriter
+from run_catalog import record_run
+from metrics import MetricRecorder
+from plotting import finish_figure, new_figure, plot_series
+from delta import apply_swap, line_sums, random_swap, swap_delta
+import time
+
+# Iterations between re-estimates of the rain under a time limit
+RAIN_UPDATE = 1000
+
+class great_deluge:
+    def __init__(self, rain_speed=None, initial_level=None, max_iterations=1000000, seed=None,
+                 budget=None, initializer="random"):
+        self.seed = seed
+        self.initializer = initializer
+        self.budget = budget
+        # None: start at the initial value and rise to 109 by the end of the run,
+        # i.e. max_iterations or the budget's evaluation or time limit
+        self.rain_speed = rain_speed
+        self.initial_level = initial_level
+        self.max_iterations = max_iterations
+        self.list_of_value = MetricRecorder()
+        self.levels = MetricRecorder()
+        self.best_value = 0
+        self.iteration = 0
+        self.duration = 0
+        self.filepath = None
+
+    def params(self):
+        return {
+            "rain_speed": self.rain_speed,
+            "initial_level": self.initial_level,
+            "max_iterations": self.max_iterations,
+            "initializer": self.initializer,
+        }
+
+    def run(self, plot=True):
+        start_time = time.time()
+        if self.seed is not None:
+            set_seed(self.seed)
+        self.trajectory = TrajectoryWriter(name="greatdeluge")
+        self.filepath = self.trajectory.filepath
+        if self.budget is not None:
+            self.budget.start()
+
+        initial = MagicCube(initializer=self.initializer)
+        initial.print_cube()
+        current = initial.flatten()
+        sums = line_sums(current)
+        value = best_value = initial.value
+        best = current[:]
+        self.list_of_value.append(value)
+        self.trajectory.append(current, value)
+
+        # A random swap is accepted when it does not lower the value or keeps
+        # it at or above the water level, which rises by `rain` every
+        # iteration; once the level passes the current value only
+        # improvements are accepted
+        level = value if self.initial_level is None else self.initial_level
+        horizon = self.max_iterations
+        if self.budget is not None and self.budget.max_evaluations is not None:
+            # One evaluation per iteration
+            horizon = min(horizon, self.budget.max_evaluations)
+        timed = self.rain_speed is None and self.budget is not None and self.budget.time_limit is not None
+        rain = self.rain_speed
+        if rain is None:
+            rain = max(0.0, 109 - level) / horizon
+        it = 0
+        while it < self.max_iterations and best_value < 109:
+            a, b = random_swap()
+            delta = swap_delta(current, sums, a, b)
+            if delta >= 0 or value + delta >= level:
+                apply_swap(current, sums, a, b)
+                if delta != 0:
+                    value += delta
+                    # Equal-value swaps are applied but not saved
+                    self.trajectory.append(current, value)
+                    if value > best_value:
+                        best_value = value
+                        best = current[:]
+            level += rain
+            self.list_of_value.append(value)
+            self.levels.append(level)
+            it += 1
+            if self.budget is not None and self.budget.update(value, 1):
+                break
+            if timed and it % RAIN_UPDATE == 0:
+                # The iterations left before the deadline are estimated from
+                # the rate so far, so the level still reaches 109 in time
+                elapsed = self.budget.elapsed()
+                left = min(horizon - it, it * (self.budget.time_limit - elapsed) / elapsed)
+                rain = max(0.0, 109 - level) / max(1.0, left)
+
+        self.trajectory.close()
+        if self.budget is not None and self.budget.exhausted():
+            print(f"Stopped by budget: {self.budget.stop_reason}")
+        best = MagicCube.from_flat(best)
+        best.print_cube()
+        self.duration = time.time() - start_time
+        self.iteration = it
+        self.best_value = best_value
+        print(f"Best value: {best_value}")
+        print(f"Iterations: {it}")
+        print(f"Time taken: {self.duration:.2f} seconds")
+        record_run("great_deluge", self.filepath, self.params(), self.seed,
+                   start_time, time.time(), initial.value, best_value, it, best)
+        if plot:
+            self.makePlot()
+
+    def makePlot(self, output=None):
+        fig = new_figure((12, 8), output)
+
+        ax = fig.add_subplot(2, 1, 1)
+        plot_series(ax, *self.list_of_value.series(), label="Value")
+        plot_series(ax, *self.levels.series(), 'r-', label="Water level")
+        ax.set_title("Magic Cube Value over Iterations (Great Deluge)")
+        ax.set_xlabel("Iteration")
+        ax.set_ylabel("Value")
+        ax.legend()
+        ax.grid(True)
+
+        ax = fig.add_subplot(2, 1, 2)
+        ax.axis('off')
+        info_text = (
+            f"Initial Value: {self.list_of_value.first}\n"
+            f"Best Value: {self.best_value}\n"
+            f"Final Level: {self.levels.last:.2f}\n"
+            f"Total Iterations: {self.iteration}\n"
+            f"Duration: {self.duration:.2f} seconds"
+        )
+        ax.text(0.1, 0.5, info_text, fontsize=12, verticalalignment='center')
+
+        finish_figure(fig, output)
+
+if __name__ == "__main__":
+    GD = great_deluge()
+    GD.run()
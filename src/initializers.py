@@ -0,0 +1,74 @@
+import random
+from itertools import product
+from delta import CELLS, SIZE, cell
+
+CENTER = CELLS // 2
+
+
+def random_numbers(rng=random):
+    numbers = list(range(1, CELLS + 1))
+    rng.shuffle(numbers)
+    return numbers
+
+
+def invertible(matrix):
+    # Determinant mod SIZE of a 3x3 matrix
+    (a, b, c), (d, e, f), (g, h, i) = matrix
+    return (a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)) % SIZE != 0
+
+
+def latin_numbers(rng=random):
+    # Writes value - 1 in base 5 as three digits, each a linear function of
+    # (i, j, k) mod 5 with nonzero coefficients, so every digit runs through
+    # 0..4 along every row/column/pillar and all 75 of them sum to 315. An
+    # invertible coefficient matrix makes the values a permutation of 1..125;
+    # random offsets and per-digit relabelings vary the construction.
+    while True:
+        matrix = [[rng.randrange(1, SIZE) for _ in range(3)] for _ in range(3)]
+        if invertible(matrix):
+            break
+    offsets = [rng.randrange(SIZE) for _ in range(3)]
+    relabel = []
+    for _ in range(3):
+        digits = list(range(SIZE))
+        rng.shuffle(digits)
+        relabel.append(digits)
+
+    numbers = [0] * CELLS
+    for i, j, k in product(range(SIZE), repeat=3):
+        value = 0
+        for row, offset, digits in zip(matrix, offsets, relabel):
+            digit = (row[0] * i + row[1] * j + row[2] * k + offset) % SIZE
+            value = value * SIZE + digits[digit]
+        numbers[cell(i, j, k)] = value + 1
+    return numbers
+
+
+def pair_complement_numbers(rng=random):
+    # Puts complementary values v and 126 - v on cells mirrored through the
+    # center, and 63 on the center itself, so every line through the center
+    # sums to 315 and every other line's sum mirrors its partner's around 315
+    total = CELLS + 1
+    pairs = list(range(1, total // 2))
+    rng.shuffle(pairs)
+    numbers = [0] * CELLS
+    numbers[CENTER] = total // 2
+    for c, value in zip(range(CENTER), pairs):
+        if rng.random() < 0.5:
+            value = total - value
+        numbers[c] = value
+        numbers[CELLS - 1 - c] = total - value
+    return numbers
+
+
+INITIALIZERS = {
+    "random": random_numbers,
+    "latin": latin_numbers,
+    "pair_complement": pair_complement_numbers,
+}
+
+
+def initial_numbers(initializer="random", rng=random):
+    if initializer not in INITIALIZERS:
+        raise ValueError(f"Unknown initializer: {initializer}")
+    return INITIALIZERS[initializer](rng)
@@ -0,0 +1,117 @@
+from MagicCube import MagicCube, set_seed
+from trajectory import TrajectoryWriter
+from run_catalog import record_run
+from metrics import MetricRecorder
+from plotting import finish_figure, new_figure, plot_series
+from delta import apply_swap, line_sums, random_swap, swap_delta
+import time
+
+class late_acceptance:
+    def __init__(self, history_length=100, max_iterations=1000000, seed=None, budget=None,
+                 initializer="random"):
+        self.seed = seed
+        self.initializer = initializer
+        self.budget = budget
+        self.history_length = history_length
+        self.max_iterations = max_iterations
+        self.list_of_value = MetricRecorder()
+        self.best_value = 0
+        self.iteration = 0
+        self.duration = 0
+        self.filepath = None
+
+    def params(self):
+        return {
+            "history_length": self.history_length,
+            "max_iterations": self.max_iterations,
+            "initializer": self.initializer,
+        }
+
+    def run(self, plot=True):
+        start_time = time.time()
+        if self.seed is not None:
+            set_seed(self.seed)
+        self.trajectory = TrajectoryWriter(name="lateacceptance")
+        self.filepath = self.trajectory.filepath
+        if self.budget is not None:
+            self.budget.start()
+
+        initial = MagicCube(initializer=self.initializer)
+        initial.print_cube()
+        current = initial.flatten()
+        sums = line_sums(current)
+        value = best_value = initial.value
+        best = current[:]
+        self.list_of_value.append(value)
+        self.trajectory.append(current, value)
+
+        # A random swap is accepted when it is no worse than the current state
+        # or than the value remembered `history_length` iterations ago, so
+        # worse moves get through while the search is still climbing and the
+        # ring buffer is the only memory beyond the state itself. A slot only
+        # ever rises (Burke & Bykov's later variant); replacing it every time
+        # lets a plateau-heavy objective like this one drift back down.
+        history = [value] * self.history_length
+        it = 0
+        while it < self.max_iterations and best_value < 109:
+            a, b = random_swap()
+            delta = swap_delta(current, sums, a, b)
+            slot = it % self.history_length
+            if delta >= 0 or value + delta >= history[slot]:
+                apply_swap(current, sums, a, b)
+                if delta != 0:
+                    value += delta
+                    # Equal-value swaps are applied but not saved
+                    self.trajectory.append(current, value)
+                    if value > best_value:
+                        best_value = value
+                        best = current[:]
+            if value > history[slot]:
+                history[slot] = value
+            self.list_of_value.append(value)
+            it += 1
+            if self.budget is not None and self.budget.update(value, 1):
+                break
+
+        self.trajectory.close()
+        if self.budget is not None and self.budget.exhausted():
+            print(f"Stopped by budget: {self.budget.stop_reason}")
+        best = MagicCube.from_flat(best)
+        best.print_cube()
+        self.duration = time.time() - start_time
+        self.iteration = it
+        self.best_value = best_value
+        print(f"Best value: {best_value}")
+        print(f"Iterations: {it}")
+        print(f"Time taken: {self.duration:.2f} seconds")
+        record_run("late_acceptance", self.filepath, self.params(), self.seed,
+                   start_time, time.time(), initial.value, best_value, it, best)
+        if plot:
+            self.makePlot()
+
+    def makePlot(self, output=None):
+        fig = new_figure((12, 8), output)
+
+        ax = fig.add_subplot(2, 1, 1)
+        plot_series(ax, *self.list_of_value.series())
+        ax.set_title("Magic Cube Value over Iterations (Late Acceptance Hill Climbing)")
+        ax.set_xlabel("Iteration")
+        ax.set_ylabel("Value")
+        ax.grid(True)
+
+        ax = fig.add_subplot(2, 1, 2)
+        ax.axis('off')
+        info_text = (
+            f"Initial Value: {self.list_of_value.first}\n"
+            f"Best Value: {self.best_value}\n"
+            f"History Length: {self.history_length}\n"
+            f"Total Iterations: {self.iteration}\n"
+            f"Duration: {self.duration:.2f} seconds"
+        )
+        ax.text(0.1, 0.5, info_text, fontsize=12, verticalalignment='center')
+
+        finish_figure(fig, output)
+
+if __name__ == "__main__":
+    LA = late_acceptance()
+    LA.run()
@@ -1,55 +1,75 @@
-from steepest_ascent import steepest_ascent
-from sideways_move import sideways_move
-from stochastic import stochastic
-from random_restart import random_restart_hill_climbing
-from simulated_annealing import SimulatedAnnealing
-from genetic_algorithm import GeneticAlgorithm
-from MagicCube import MagicCube
-from visualizer import Visualizer
+# Algorithm, plotting and GUI modules pull in NumPy, matplotlib and flet, so
+# they are imported only by the command or menu entry that needs them
+import argparse
+import json
 import os
 from typing import Optional
 import sys
+import metrics
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def run_experiment(method: int) -> Optional[str]:
+def run_experiment(method: int, initializer: str = "random") -> Optional[str]:
     try:
         if method == 1:
             print("\nRunning Steepest Ascent Hill Climbing...")
-            S = steepest_ascent()
+            from steepest_ascent import steepest_ascent
+            S = steepest_ascent(initializer=initializer)
             S.run()
-            return "steepest_ascent.txt"
+            return S.filepath
         elif method == 2:
             print("\nRunning Sideways Move Hill Climbing...")
-            SW = sideways_move()
+            from sideways_move import sideways_move
+            SW = sideways_move(initializer=initializer)
             SW.run()
-            return "sideways_move.txt"
+            return SW.filepath
         elif method == 3:
             print("\nRunning Stochastic Hill Climbing...")
-            SH = stochastic()
+            from stochastic import stochastic
+            SH = stochastic(initializer=initializer)
             SH.run()
-            return "stochastic.txt"
+            return SH.filepath
         elif method == 4:
             print("\nRunning Random Restart Hill Climbing...")
-            RR = random_restart_hill_climbing()
+            from random_restart import random_restart_hill_climbing
+            RR = random_restart_hill_climbing(initializer=initializer)
             RR.run()
-            return "random_restart.txt"
+            return RR.filepath
         elif method == 5:
             print("\nRunning Simulated Annealing...")
-            SA = SimulatedAnnealing()
-            initial_cube = MagicCube()
-            SA.run_experiments(1)
-            return "simulated_annealing.txt"
+            from simulated_annealing import SimulatedAnnealing
+            SA = SimulatedAnnealing(max_iterations=1000, initializer=initializer)
+            results = SA.run_experiments(1)
+            return results[0]['filepath']
         elif method == 6:
             print("\nRunning Genetic Algorithm...")
+            from genetic_algorithm import GeneticAlgorithm
+            from MagicCube import MagicCube
             population_size = int(input("Enter population size (default 500): ") or "500")
             iterations = int(input("Enter number of iterations (default 100): ") or "100")
-            GA = GeneticAlgorithm(population_size=population_size, iterations=iterations)
-            initial_cube = MagicCube()
-            best_cube, best_fitness = GA.run(initial_cube)
+            islands = int(input("Enter number of islands (default 1): ") or "1")
+            GA = GeneticAlgorithm(population_size=population_size, iterations=iterations,
+                                  initializer=initializer)
+            initial_cube = MagicCube(initializer=initializer)
+            if islands > 1:
+                best_cube, best_fitness = GA.run_islands(initial_cube, islands=islands)
+            else:
+                best_cube, best_fitness = GA.run(initial_cube)
             print(f"\nBest fitness achieved: {best_fitness}/109")
             return None  # GA doesn't generate visualization file
+        elif method == 7:
+            print("\nRunning Late Acceptance Hill Climbing...")
+            from late_acceptance import late_acceptance
+            LA = late_acceptance(initializer=initializer)
+            LA.run()
+            return LA.filepath
+        elif method == 8:
+            print("\nRunning Great Deluge...")
+            from great_deluge import great_deluge
+            GD = great_deluge(initializer=initializer)
+            GD.run()
+            return GD.filepath
         else:
             print("\nInvalid method number!")
             return None
@@ -57,12 +77,6 @@ def run_experiment(method: int) -> Optional[str]:
         print(f"\nError running experiment: {str(e)}")
         return None
 
-def list_save_files() -> list:
-    directory = "./save_file"
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    return sorted([f for f in os.listdir(directory) if f.endswith(".txt")])
-
 def main():
     while True:
         clear_screen()
@@ -85,13 +99,16 @@ def main():
                 print("4. Random Restart Hill Climbing")
                 print("5. Simulated Annealing")
                 print("6. Genetic Algorithm")
+                print("7. Late Acceptance Hill Climbing")
+                print("8. Great Deluge")
                 print("0. Back to menu")
                 print()
 
-                method = int(input("Choose method (1-6): "))
+                method = int(input("Choose method (1-8): "))
 
                 if (method != 0):
-                    result_file = run_experiment(method)
+                    initializer = input("Initial state (random/latin/pair_complement, default random): ") or "random"
+                    result_file = run_experiment(method, initializer)
                     if result_file:
                         print(f"\nExperiment completed! Results saved to: {result_file}")
                     input("\nPress Enter to continue...")
@@ -99,6 +116,7 @@ def main():
             elif choice == 2:
                 clear_screen()
 
+                from visualizer import Visualizer
                 V = Visualizer()
                 V.visualize()
 
@@ -134,5 +152,73 @@ def main():
             print("\n\nExiting program...")
             sys.exit(0)
 
+def solve_command(args):
+    from run_catalog import parse_age
+    from solver import parse_param, solve
+
+    params = dict(parse_param(param) for param in args.param)
+    if args.initializer:
+        params["initializer"] = args.initializer
+    budget = {
+        "time_limit": parse_age(args.budget) if args.budget else None,
+        "max_evaluations": args.max_evaluations,
+        "target_value": args.target,
+        "stagnation": args.stagnation,
+    }
+    progress = None
+    if args.progress:
+        progress = lambda snapshot: print(json.dumps(snapshot), file=sys.stderr)
+
+    result = solve(args.algo, params, args.seed,
+                   {key: value for key, value in budget.items() if value is not None},
+                   progress, args.out, quiet=not args.verbose)
+    print(json.dumps(result, indent=2))
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Magic Cube local search")
+    parser.add_argument("--metrics", choices=metrics.STRATEGIES,
+                        help="how per-step histories are kept (default minmax)")
+    parser.add_argument("--metrics-capacity", type=int, help="points kept per history (default 20000)")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("menu", help="interactive menu (the default)")
+    subparsers.add_parser("visualize", help="open the visualizer")
+    compare_parser = subparsers.add_parser("compare", help="play several .traj files side by side")
+    compare_parser.add_argument("files", nargs="*", help="trajectory files (or pick them in the window)")
+    compare_parser.add_argument("--sync", choices=["progress", "time"], default="progress",
+                                help="align runs by fraction of their length or by wall time")
+
+    solve_parser = subparsers.add_parser("solve", help="run one algorithm without prompts or plots")
+    solve_parser.add_argument("--algo", required=True,
+                              help="steepest_ascent, sideways_move, stochastic, random_restart, "
+                                   "simulated_annealing (sa), genetic_algorithm (ga), "
+                                   "late_acceptance (lahc) or great_deluge (gd)")
+    solve_parser.add_argument("--seed", type=int)
+    solve_parser.add_argument("--budget", help="time limit, e.g. 10s, 5m, 1h")
+    solve_parser.add_argument("--max-evaluations", type=int)
+    solve_parser.add_argument("--target", type=int, help="stop once this value is reached")
+    solve_parser.add_argument("--stagnation", type=int, help="stop after this many steps without improvement")
+    solve_parser.add_argument("--initializer", help="random, latin or pair_complement")
+    solve_parser.add_argument("--param", action="append", default=[], metavar="KEY=VALUE",
+                              help="constructor argument, e.g. population_size=500 (repeatable)")
+    solve_parser.add_argument("--out", help="output directory for the save file and catalog")
+    solve_parser.add_argument("--progress", action="store_true", help="print progress to stderr")
+    solve_parser.add_argument("--verbose", action="store_true", help="show the algorithm's own output")
+
+    args = parser.parse_args(argv)
+    metrics.configure(args.metrics, args.metrics_capacity)
+    if args.command == "solve":
+        try:
+            solve_command(args)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.command == "visualize":
+        from visualizer import Visualizer
+        Visualizer().visualize()
+    elif args.command == "compare":
+        from visualizer import ComparisonVisualizer
+        ComparisonVisualizer(args.files, args.sync).visualize()
+    else:
+        main()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
\ No newline at end of file
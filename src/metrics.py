@@ -0,0 +1,183 @@
+import random
+from array import array
+from collections import deque
+
+STRATEGIES = ("all", "stride", "minmax", "reservoir")
+
+_defaults = {"strategy": "minmax", "capacity": 20000}
+
+
+def configure(strategy=None, capacity=None):
+    if strategy is not None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown metrics strategy: {strategy}")
+        _defaults["strategy"] = strategy
+    if capacity is not None:
+        _defaults["capacity"] = capacity
+
+
+class MetricRecorder:
+    # Records one number per step in typed arrays. "all" keeps everything;
+    # the other strategies keep roughly `capacity` points:
+    #   stride     every k-th point, k doubling whenever the buffer fills
+    #   minmax     min and max of each bucket of k steps, so spikes stay visible
+    #   reservoir  a uniform random sample of all steps
+    def __init__(self, strategy=None, capacity=None):
+        self.strategy = strategy or _defaults["strategy"]
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown metrics strategy: {self.strategy}")
+        self.capacity = capacity or _defaults["capacity"]
+        self.x = array("q")
+        self.y = array("d")
+        self.count = 0
+        self.first = None
+        self.last = None
+        self.step = 1
+        self.bucket = None
+        self.rng = random.Random(0)
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        index = self.count
+        self.count += 1
+        if self.first is None:
+            self.first = value
+        self.last = value
+
+        if self.strategy == "all":
+            self.y.append(value)
+        elif self.strategy == "stride":
+            if index % self.step == 0:
+                self.x.append(index)
+                self.y.append(value)
+                if len(self.x) > self.capacity:
+                    self.thin()
+        elif self.strategy == "minmax":
+            self.add_to_bucket(index, value)
+        else:
+            if len(self.x) < self.capacity:
+                self.x.append(index)
+                self.y.append(value)
+            else:
+                slot = self.rng.randrange(self.count)
+                if slot < self.capacity:
+                    self.x[slot] = index
+                    self.y[slot] = value
+
+    def append_repeat(self, value, count):
+        # Same as `count` appends of `value`, without a Python call per step
+        if count <= 0:
+            return
+        if self.strategy == "all":
+            if self.first is None:
+                self.first = value
+            self.last = value
+            self.y.extend([value] * count)
+            self.count += count
+        elif self.strategy == "minmax":
+            end = self.count + count
+            while self.count < end:
+                # Only the first step that opens a bucket can change its min/max
+                self.append(value)
+                bucket_end = (self.count - 1) // self.step * self.step + self.step
+                self.count = min(end, bucket_end)
+        elif self.strategy == "stride":
+            end = self.count + count
+            while self.count < end:
+                self.append(value)
+                next_kept = -(-self.count // self.step) * self.step
+                self.count = min(end, max(self.count, next_kept))
+        else:
+            for _ in range(count):
+                self.append(value)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def thin(self):
+        self.step *= 2
+        keep = [n for n, x in enumerate(self.x) if x % self.step == 0]
+        self.x = array("q", (self.x[n] for n in keep))
+        self.y = array("d", (self.y[n] for n in keep))
+
+    def add_to_bucket(self, index, value):
+        if self.bucket is not None and index // self.step != self.bucket[0] // self.step:
+            self.close_bucket()
+        if self.bucket is None:
+            self.bucket = [index, index, value, index, value]
+            return
+        if value < self.bucket[2]:
+            self.bucket[1], self.bucket[2] = index, value
+        if value > self.bucket[4]:
+            self.bucket[3], self.bucket[4] = index, value
+
+    def bucket_points(self):
+        if self.bucket is None:
+            return []
+        _, min_x, min_y, max_x, max_y = self.bucket
+        if min_x == max_x:
+            return [(min_x, min_y)]
+        return sorted([(min_x, min_y), (max_x, max_y)])
+
+    def close_bucket(self):
+        for x, y in self.bucket_points():
+            self.x.append(x)
+            self.y.append(y)
+        self.bucket = None
+        if len(self.x) > self.capacity:
+            self.merge_buckets()
+
+    def merge_buckets(self):
+        self.step *= 2
+        x_out, y_out = array("q"), array("d")
+        group = None
+        points = []
+        for x, y in zip(self.x, self.y):
+            if x // self.step != group:
+                x_out.extend(p[0] for p in points)
+                y_out.extend(p[1] for p in points)
+                group = x // self.step
+                points = [(x, y)]
+            else:
+                points.append((x, y))
+                low = min(points, key=lambda p: p[1])
+                high = max(points, key=lambda p: p[1])
+                points = [low] if low is high else sorted([low, high])
+        x_out.extend(p[0] for p in points)
+        y_out.extend(p[1] for p in points)
+        self.x, self.y = x_out, y_out
+
+    def series(self):
+        if self.strategy == "all":
+            return range(len(self.y)), self.y
+        if self.strategy == "minmax":
+            points = self.bucket_points()
+            return (list(self.x) + [p[0] for p in points],
+                    list(self.y) + [p[1] for p in points])
+        if self.strategy == "reservoir":
+            points = sorted(zip(self.x, self.y))
+            return [p[0] for p in points], [p[1] for p in points]
+        return self.x, self.y
+
+    def values(self):
+        return self.series()[1]
+
+
+class MovingAverage:
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+
+    def update(self, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        return self.total / len(self.values)
+
+    def full(self):
+        return len(self.values) == self.window
@@ -0,0 +1,48 @@
+import numpy as np
+from delta import CELLS, LINES, MAGIC_NUMBER
+
+# INCIDENCE[c, n] is 1 when cell c lies on line n
+INCIDENCE = np.zeros((CELLS, len(LINES)), dtype=np.int16)
+for n, line in enumerate(LINES):
+    INCIDENCE[list(line), n] = 1
+
+
+def random_pairs(rng, count):
+    # `count` uniformly random swaps of two distinct cells
+    a = rng.integers(0, CELLS, count)
+    b = rng.integers(0, CELLS - 1, count)
+    b += b >= a
+    return a, b
+
+
+def batch_swap_delta(flat, sums, a, b):
+    # Value change of each swap (a[i], b[i]) applied on its own to `flat`
+    diff = (flat[b] - flat[a]).astype(np.int32)
+    new_sums = sums + (INCIDENCE[a] - INCIDENCE[b]) * diff[:, None]
+    return (new_sums == MAGIC_NUMBER).sum(axis=1) - int((sums == MAGIC_NUMBER).sum())
+
+
+def apply_swap(flat, sums, a, b):
+    diff = int(flat[b]) - int(flat[a])
+    sums += (INCIDENCE[a] - INCIDENCE[b]) * diff
+    flat[a], flat[b] = flat[b], flat[a]
+
+
+class BatchedSwaps:
+    # Pre-draws swaps in NumPy blocks. Callers score a window of upcoming swaps
+    # and consume only the ones they used; the rest are re-scored next time.
+    def __init__(self, rng, block_size=4096):
+        self.rng = rng
+        self.block_size = block_size
+        self.a, self.b = random_pairs(rng, block_size)
+        self.position = 0
+
+    def peek(self, limit):
+        if self.position >= len(self.a):
+            self.a, self.b = random_pairs(self.rng, self.block_size)
+            self.position = 0
+        end = min(len(self.a), self.position + limit)
+        return self.a[self.position:end], self.b[self.position:end]
+
+    def consume(self, count):
+        self.position += count
@@ -0,0 +1,66 @@
+import math
+import time
+
+
+class PlaybackScheduler:
+    # Maps wall-clock time to a trajectory index: playback advances `speed`
+    # states per second from wherever it was started, whatever a frame costs
+    # to draw. Frames are paced at `fps`; states that fall between two frames
+    # are skipped, and no frame is produced while the index stays the same.
+    def __init__(self, fps=30, speed=1.0, clock=time.monotonic):
+        self.fps = fps
+        self.speed = speed
+        self.clock = clock
+        self.length = 0
+        self.direction = 1
+        self.origin = 0.0
+        self.origin_time = 0.0
+        self.next_tick = 0.0
+
+    def start(self, index, length, direction=1):
+        self.length = length
+        self.direction = direction
+        self.origin = float(index)
+        self.origin_time = self.clock()
+        self.next_tick = self.origin_time
+
+    def set_speed(self, speed):
+        # Re-anchors at the current position so the index does not jump
+        self.origin = self.position()
+        self.origin_time = self.clock()
+        self.speed = speed
+
+    def position(self, now=None):
+        if now is None:
+            now = self.clock()
+        position = self.origin + self.direction * self.speed * (now - self.origin_time)
+        return min(max(position, 0.0), self.length - 1.0)
+
+    def index(self, now=None):
+        # Rounded towards where playback came from, so a state is shown for
+        # the full 1 / speed seconds in either direction
+        position = self.position(now)
+        return math.ceil(position) if self.direction < 0 else math.floor(position)
+
+    def finished(self, index):
+        return index <= 0 if self.direction < 0 else index >= self.length - 1
+
+    def time_until(self, index):
+        # Seconds until playback reaches `index`
+        distance = abs(index - self.origin)
+        return self.origin_time + distance / self.speed - self.clock()
+
+    def wait(self, shown, sleep=time.sleep):
+        # Blocks until the next frame is due and returns the index to show
+        # there. `shown` is the index currently on screen.
+        frame = 1.0 / self.fps
+        next_index = shown - 1 if self.direction < 0 else shown + 1
+        # Sleep until the next frame tick, or longer if the index would not
+        # have changed by then
+        delay = max(self.next_tick - self.clock(), self.time_until(next_index))
+        if delay > 0:
+            sleep(delay)
+        now = self.clock()
+        # Ticks that were missed because drawing took too long are dropped
+        self.next_tick = max(self.next_tick + frame, now)
+        return self.index(now)
@@ -0,0 +1,93 @@
+# NumPy, like matplotlib, is imported by the helpers that use it, so runs
+# that never plot do not pay for it
+DPI = 100
+
+
+def as_arrays(x, y):
+    import numpy as np
+    if isinstance(x, range):
+        x = np.arange(x.start, x.stop, x.step, dtype=float)
+    return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+
+def minmax_decimate(x, y, buckets):
+    # Keep the min and max of each bucket, in x order, so peaks survive
+    import numpy as np
+    x, y = as_arrays(x, y)
+    if len(x) <= 2 * buckets:
+        return x, y
+    edges = np.linspace(0, len(x), buckets + 1).astype(int)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        segment = y[start:end]
+        low = start + int(np.argmin(segment))
+        high = start + int(np.argmax(segment))
+        keep.extend(sorted({low, high}))
+    keep = np.array(keep)
+    return x[keep], y[keep]
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the point of each bucket that forms
+    # the largest triangle with the previous kept point and the next bucket's mean
+    import numpy as np
+    x, y = as_arrays(x, y)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def decimate(x, y, width, method="minmax"):
+    if method == "lttb":
+        return lttb(x, y, width)
+    return minmax_decimate(x, y, width // 2)
+
+
+def moving_average(values, window):
+    import numpy as np
+    values = np.asarray(values, dtype=float)
+    if len(values) < window:
+        return np.array([])
+    cumsum = np.cumsum(np.insert(values, 0, 0.0))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def plot_series(ax, x, y, *args, method="minmax", **kwargs):
+    width = int(ax.figure.get_figwidth() * ax.get_position().width * DPI)
+    ax.plot(*decimate(x, y, max(width, 100), method), *args, **kwargs)
+
+
+def new_figure(figsize, output=None):
+    if output is None:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    # A bare Figure renders through Agg/SVG on savefig without any GUI backend.
+    # matplotlib is imported here so headless runs that never plot skip it.
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize, dpi=DPI)
+
+
+def finish_figure(fig, output=None):
+    fig.tight_layout()
+    if output is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        fig.savefig(output)
@@ -0,0 +1,187 @@
+import argparse
+import json
+import math
+import queue
+import signal
+import sys
+import time
+from multiprocessing import Process, Queue
+from solver import algorithm_name, parse_param
+
+DEFAULT_CONFIGS = ["sa", "rr", "lahc", "gd"]
+# Seconds a run may overrun the deadline (a GA epoch, a steepest ascent step)
+# before it is stopped
+GRACE = 5.0
+
+
+def parse_config(text):
+    # "algorithm" or "algorithm:key=value,key=value"
+    algorithm, _, params = text.partition(":")
+    return {
+        "algorithm": algorithm_name(algorithm),
+        "params": dict(parse_param(param) for param in params.split(",") if param),
+    }
+
+
+def portfolio_worker(n, config, budget, root, events):
+    # Runs one configuration through solver.solve, streaming budget snapshots.
+    # SIGTERM from the coordinator exits through SystemExit, so the queue is
+    # flushed and island GA workers are shut down on the way out.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from solver import solve
+    from trajectory import TrajectoryReader
+
+    def progress(snapshot):
+        events.put(("progress", n, snapshot))
+
+    try:
+        result = solve(config["algorithm"], config.get("params"), config.get("seed"), budget,
+                       progress, root, quiet=True)
+        with TrajectoryReader(result["path"]) as reader:
+            index = reader.best()
+            if index is not None:
+                result["best_state"] = list(reader.cells(index))
+    except Exception as e:
+        events.put(("error", n, f"{type(e).__name__}: {e}"))
+    else:
+        events.put(("done", n, result))
+
+
+def rung_times(configs, time_limit, eta):
+    # Successive halving over wall time: with R = ceil(log_eta(configs)) the
+    # field is cut to 1/eta at time_limit / eta^R, ..., time_limit / eta
+    rungs = math.ceil(math.log(configs, eta)) if configs > 1 else 0
+    return [time_limit / eta ** (rungs - k) for k in range(rungs)]
+
+
+def race(configs, time_limit, eta=2, target_value=109, progress_interval=0.25, root=None,
+         report=None):
+    # Starts every config ({"algorithm", "params", "seed"}) in its own process
+    # under one deadline. At each rung only the best 1/eta of the runs still
+    # going (by best value reported so far) continue; the rest are stopped.
+    # Returns as soon as a run reaches `target_value`, otherwise at the
+    # deadline, with the winning run's record (including "best_state") and
+    # every run's status. `report(message)` is called on each decision.
+    report = report or (lambda message: None)
+    budget = {"time_limit": time_limit, "target_value": target_value,
+              "progress_interval": progress_interval}
+    events = Queue()
+    runs = []
+    for n, config in enumerate(configs):
+        process = Process(target=portfolio_worker, args=(n, config, budget, root, events))
+        runs.append({"config": config, "process": process, "status": "running",
+                     "best_value": None, "snapshot": None, "result": None})
+
+    start = time.monotonic()
+    for run in runs:
+        run["process"].start()
+    rungs = rung_times(len(runs), time_limit, eta)
+    winner = None
+
+    def running():
+        return [run for run in runs if run["status"] == "running"]
+
+    def stop(run, status):
+        run["status"] = status
+        run["process"].terminate()
+
+    def label(run):
+        config = run["config"]
+        params = ",".join(f"{key}={value}" for key, value in config.get("params", {}).items())
+        return config["algorithm"] + (f":{params}" if params else "")
+
+    try:
+        while running():
+            now = time.monotonic() - start
+            due = rungs[0] if rungs else time_limit + GRACE
+            try:
+                kind, n, payload = events.get(timeout=max(0.0, due - now))
+            except queue.Empty:
+                pass
+            else:
+                run = runs[n]
+                if kind == "progress":
+                    run["snapshot"] = payload
+                    run["best_value"] = payload["best_value"]
+                elif kind == "done":
+                    run["status"] = "done"
+                    run["result"] = payload
+                    run["best_value"] = payload["final_value"]
+                    report(f"{label(run)} finished with {payload['final_value']}")
+                    if payload["final_value"] >= target_value:
+                        winner = run
+                        for other in running():
+                            stop(other, "stopped")
+                        report(f"{label(run)} reached {target_value}; stopping the rest")
+                        break
+                elif kind == "error" and run["status"] == "running":
+                    run["status"] = "error"
+                    run["result"] = {"error": payload}
+                    report(f"{label(run)} failed: {payload}")
+
+            now = time.monotonic() - start
+            if rungs and now >= rungs[0]:
+                rungs.pop(0)
+                # Runs that have not reported yet (a first GA epoch, a slow
+                # first climb) are not judged at this rung
+                alive = [run for run in running() if run["best_value"] is not None]
+                ranked = sorted(alive, key=lambda run: run["best_value"], reverse=True)
+                keep = max(1, math.ceil(len(alive) / eta))
+                for run in ranked[keep:]:
+                    stop(run, "stopped")
+                if ranked[keep:]:
+                    kept = ", ".join(f"{label(run)} ({run['best_value']})" for run in ranked[:keep])
+                    stopped = ", ".join(f"{label(run)} ({run['best_value']})" for run in ranked[keep:])
+                    report(f"{now:.1f}s: kept {kept}; stopped {stopped}")
+            elif now >= time_limit + GRACE:
+                for run in running():
+                    stop(run, "stopped")
+                report("deadline passed; stopping the runs still going")
+    finally:
+        for run in runs:
+            if run["status"] == "running":
+                stop(run, "stopped")
+        for run in runs:
+            run["process"].join(GRACE)
+            if run["process"].is_alive():
+                run["process"].kill()
+                run["process"].join()
+
+    if winner is None:
+        done = [run for run in runs if run["status"] == "done"]
+        if done:
+            winner = max(done, key=lambda run: run["best_value"])
+    return {
+        "winner": None if winner is None else dict(winner["result"], config=winner["config"]),
+        "elapsed": time.monotonic() - start,
+        "runs": [{"config": run["config"], "status": run["status"], "best_value": run["best_value"],
+                  "result": run["result"]} for run in runs],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race several algorithm configurations under one deadline")
+    parser.add_argument("--config", action="append", metavar="ALGO[:KEY=VALUE,...]",
+                        help=f"a configuration to race (repeatable; default {' '.join(DEFAULT_CONFIGS)})")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="seconds for the whole race")
+    parser.add_argument("--eta", type=float, default=2.0, help="keep 1/eta of the runs at each rung")
+    parser.add_argument("--target", type=int, default=109, help="stop everything once a run reaches this")
+    parser.add_argument("--seed", type=int, help="seed of the first config; the others get seed + n")
+    parser.add_argument("--root", help="output directory for the runs")
+    args = parser.parse_args()
+
+    try:
+        configs = [parse_config(text) for text in args.config or DEFAULT_CONFIGS]
+    except ValueError as e:
+        parser.error(str(e))
+    for n, config in enumerate(configs):
+        config["seed"] = None if args.seed is None else args.seed + n
+
+    result = race(configs, args.time_limit, args.eta, args.target, root=args.root,
+                  report=lambda message: print(message, file=sys.stderr))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,35 @@
-from MagicCube import MagicCube
-import matplotlib.pyplot as plt
+from MagicCube import MagicCube, NEIGHBORHOOD_SIZE, set_seed
+from trajectory import TrajectoryWriter
+from run_catalog import record_run
+from metrics import MetricRecorder
+from plotting import finish_figure, new_figure, plot_series
 import time
-from typing import List, Tuple
-import os
+from typing import Optional, Tuple
+from budget import Budget
 
 class random_restart_hill_climbing:
-    def __init__(self, max_restarts: int = 10):
-        self.list_of_value: List[int] = []
+    def __init__(self, max_restarts: int = 10, seed: Optional[int] = None,
+                 budget: Optional[Budget] = None, initializer: str = "random"):
+        self.seed = seed
+        self.initializer = initializer
+        self.budget = budget
+        self.list_of_value = MetricRecorder()
         self.max_restarts = max_restarts
         self.num_restarts = 0
+        self.local_optima = set()
+        # One record per climb: start/final value, iterations, duration and the
+        # trajectory index of its initial state
+        self.restarts = []
         self.total_iterations = 0
         self.start_time = 0
         self.end_time = 0
-        self.filepath = self.make_file("randomrestart")
+        self.filepath = None
 
     def hill_climbing(self, current: MagicCube) -> Tuple[MagicCube, int]:
 
         iterations = 0
         self.list_of_value.append(current.value)
+        self.trajectory.append(current)
 
         while True:
             successor = current.get_successor("best")
@@ -27,15 +39,23 @@ class random_restart_hill_climbing:
             self.list_of_value.append(current.value)
             iterations += 1
 
-            current.save_state(self.filepath)
+            self.trajectory.append(current)
+            if self.budget is not None and self.budget.update(current.value, NEIGHBORHOOD_SIZE):
+                break
 
         return current, iterations
 
-    def run(self) -> None:
+    def run(self, plot: bool = True) -> None:
 
         self.start_time = time.time()
-
-        best_cube = MagicCube()
+        if self.seed is not None:
+            set_seed(self.seed)
+        self.trajectory = TrajectoryWriter(name="randomrestart")
+        self.filepath = self.trajectory.filepath
+        if self.budget is not None:
+            self.budget.start()
+
+        best_cube = MagicCube(initializer=self.initializer)
         best_value = best_cube.value
 
         print(f"Initial state:")
@@ -43,10 +63,26 @@ class random_restart_hill_climbing:
         print(f"Initial value: {best_value}\n")
 
         while self.num_restarts < self.max_restarts:
-            current = MagicCube()  # Random restart
+            current = MagicCube(initializer=self.initializer)  # Random restart
+            climb_start = time.time()
+            start_index = len(self.trajectory)
+            start_value = current.value
+            self.trajectory.mark("restart", restart=self.num_restarts + 1)
             current, iterations = self.hill_climbing(current)
             self.total_iterations += iterations
 
+            record = {
+                "restart": self.num_restarts + 1,
+                "start_value": start_value,
+                "final_value": current.value,
+                "iterations": iterations,
+                "duration": time.time() - climb_start,
+                "start_index": start_index,
+            }
+            self.restarts.append(record)
+            self.trajectory.mark("restart_end", **record)
+            self.local_optima.add(current.canonical_form())
+
             if current.value > best_value:
                 best_cube = current
                 best_value = current.value
@@ -55,44 +91,60 @@ class random_restart_hill_climbing:
 
             if best_value == 109:
                 break
+            if self.budget is not None and self.budget.exhausted():
+                print(f"Stopped by budget: {self.budget.stop_reason}")
+                break
 
 
+        self.trajectory.close()
         self.end_time = time.time()
 
         print(f"\nFinal state:")
         best_cube.print_cube()
         print(f"\nResults:")
         print(f"Number of restarts: {self.num_restarts}")
+        print(f"Distinct local optima: {len(self.local_optima)}")
         print(f"Total iterations: {self.total_iterations}")
         print(f"Best value found: {best_value}")
         print(f"Time taken: {self.end_time - self.start_time:.2f} seconds")
-
-        self.makePlot()
-
-    def makePlot(self) -> None:
-
-        plt.figure(figsize=(12, 6))
-        plt.plot(list(range(len(self.list_of_value))), self.list_of_value)
-        plt.title("Magic Cube Value over Iterations (Random Restart Hill Climbing)")
-        plt.xlabel("Iteration")
-        plt.ylabel("Value")
-        plt.grid()
-        plt.show()
-
-    def make_file(self, name):
-        directory = ".\\save_file"
-        os.makedirs(directory, exist_ok=True)
-        
-        counter = 1
-        while True:
-            filename = f"{name}{counter}.txt"
-            filepath = os.path.join(directory, filename)
-            
-            if not os.path.exists(filepath):
-                break
-            counter += 1
-        
-        return filepath
+        self.print_restarts()
+
+        record_run("random_restart", self.filepath, {"max_restarts": self.max_restarts,
+                                                       "initializer": self.initializer}, self.seed,
+                   self.start_time, self.end_time, self.list_of_value.first, best_value, self.total_iterations,
+                   best_cube)
+
+        if plot:
+            self.makePlot()
+
+    def print_restarts(self, limit: int = 20) -> None:
+
+        if not self.restarts:
+            return
+        n = len(self.restarts)
+        print("\nPer-restart results:")
+        print(f"{'Restart':>8} {'Start':>6} {'Final':>6} {'Iterations':>11} {'Time (s)':>9}")
+        for record in self.restarts[:limit]:
+            print(f"{record['restart']:>8} {record['start_value']:>6} {record['final_value']:>6} "
+                  f"{record['iterations']:>11} {record['duration']:>9.3f}")
+        if n > limit:
+            print(f"{'...':>8} ({n - limit} more)")
+        best = max(self.restarts, key=lambda record: record["final_value"])
+        print(f"Mean climb: {sum(r['iterations'] for r in self.restarts) / n:.1f} iterations, "
+              f"{sum(r['duration'] for r in self.restarts) / n:.3f} s, "
+              f"gain {sum(r['final_value'] - r['start_value'] for r in self.restarts) / n:.1f}")
+        print(f"Best value first reached at restart {best['restart']}")
+
+    def makePlot(self, output: Optional[str] = None) -> None:
+
+        fig = new_figure((12, 6), output)
+        ax = fig.add_subplot(1, 1, 1)
+        plot_series(ax, *self.list_of_value.series())
+        ax.set_title("Magic Cube Value over Iterations (Random Restart Hill Climbing)")
+        ax.set_xlabel("Iteration")
+        ax.set_ylabel("Value")
+        ax.grid()
+        finish_figure(fig, output)
 
 def run_experiment(num_trials: int = 3) -> None:
 
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from run_storage import get_root
+
+CATALOG = "catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    params TEXT NOT NULL,
+    seed INTEGER,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    duration REAL NOT NULL,
+    initial_value INTEGER,
+    final_value INTEGER NOT NULL,
+    iterations INTEGER NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_algorithm ON runs (algorithm, final_value);
+CREATE INDEX IF NOT EXISTS runs_start_time ON runs (start_time);
+CREATE TABLE IF NOT EXISTS best_states (
+    state TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    run_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS best_states_value ON best_states (value);
+"""
+
+COLUMNS = ["run_id", "algorithm", "params", "seed", "start_time", "end_time", "duration",
+           "initial_value", "final_value", "iterations", "path"]
+ORDERS = {
+    "best": "final_value DESC, duration ASC",
+    "recent": "start_time DESC",
+    "fastest": "duration ASC",
+}
+
+
+def connect(root=None):
+    connection = sqlite3.connect(os.path.join(get_root(root), CATALOG), timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record_run(algorithm, path, params, seed, start_time, end_time,
+               initial_value, final_value, iterations, best_state=None, root=None):
+    run_id = os.path.splitext(os.path.basename(path))[0]
+    row = (run_id, algorithm, json.dumps(params, sort_keys=True), seed, start_time, end_time,
+           end_time - start_time, initial_value, final_value, iterations, path)
+    connection = connect(root)
+    try:
+        with connection:
+            connection.execute(
+                f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                row)
+            if best_state is not None:
+                # Archived by canonical form, so symmetric copies of one
+                # solution are stored once under the first run that found it
+                connection.execute(
+                    "INSERT OR IGNORE INTO best_states (state, value, run_id) VALUES (?, ?, ?)",
+                    (" ".join(map(str, best_state.canonical_form())), final_value, run_id))
+    finally:
+        connection.close()
+    return run_id
+
+
+def query_runs(algorithm=None, since=None, min_value=None, order="best", limit=20, root=None):
+    clauses = []
+    args = []
+    if algorithm:
+        clauses.append("algorithm = ?")
+        args.append(algorithm)
+    if since is not None:
+        clauses.append("start_time >= ?")
+        args.append(since)
+    if min_value is not None:
+        clauses.append("final_value >= ?")
+        args.append(min_value)
+
+    sql = f"SELECT {', '.join(COLUMNS)} FROM runs"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {ORDERS[order]}"
+    if limit:
+        sql += " LIMIT ?"
+        args.append(limit)
+
+    connection = connect(root)
+    try:
+        rows = connection.execute(sql, args).fetchall()
+    finally:
+        connection.close()
+
+    runs = []
+    for row in rows:
+        run = dict(zip(COLUMNS, row))
+        run["params"] = json.loads(run["params"])
+        runs.append(run)
+    return runs
+
+
+def get_run(run_id, root=None):
+    # Most recent record of `run_id`, or None
+    connection = connect(root)
+    try:
+        row = connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM runs WHERE run_id = ? ORDER BY id DESC LIMIT 1",
+            (run_id,)).fetchone()
+    finally:
+        connection.close()
+    if row is None:
+        return None
+    run = dict(zip(COLUMNS, row))
+    run["params"] = json.loads(run["params"])
+    return run
+
+
+def parse_age(text):
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def print_runs(runs):
+    print(f"{'run':<28}{'algorithm':<22}{'value':>6}{'iters':>10}{'seconds':>10}  started")
+    for run in runs:
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["start_time"]))
+        print(f"{run['run_id']:<28}{run['algorithm']:<22}{run['final_value']:>6}"
+              f"{run['iterations']:>10}{run['duration']:>10.2f}  {started}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the catalog of saved Magic Cube runs")
+    parser.add_argument("--root", help="output directory holding the catalog")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list runs")
+    list_parser.add_argument("--algo", help="algorithm name, e.g. simulated_annealing")
+    list_parser.add_argument("--since", help="only runs started within this age, e.g. 7d, 12h")
+    list_parser.add_argument("--min-value", type=int)
+    list_parser.add_argument("--order", choices=sorted(ORDERS), default="best")
+    list_parser.add_argument("--limit", type=int, default=20)
+
+    show_parser = subparsers.add_parser("show", help="show every recorded field of a run")
+    show_parser.add_argument("run_id")
+
+    args = parser.parse_args()
+    if args.command == "list":
+        since = time.time() - parse_age(args.since) if args.since else None
+        print_runs(query_runs(args.algo, since, args.min_value, args.order, args.limit, args.root))
+    elif args.command == "show":
+        connection = connect(args.root)
+        try:
+            rows = connection.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM runs WHERE run_id = ?", (args.run_id,)).fetchall()
+        finally:
+            connection.close()
+        for row in rows:
+            print(json.dumps(dict(zip(COLUMNS, row)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
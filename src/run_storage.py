@@ -0,0 +1,62 @@
+import os
+
+ROOT_ENV = "MAGICCUBE_SAVE_DIR"
+DEFAULT_ROOT = "save_file"
+COUNTERS = ".counters"
+
+_root = None
+
+
+def set_root(root):
+    global _root
+    _root = root
+
+
+def get_root(root=None):
+    root = root or _root or os.environ.get(ROOT_ENV) or DEFAULT_ROOT
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def read_counter(path):
+    try:
+        with open(path, "r") as file:
+            return max(1, int(file.read().strip() or 1))
+    except (FileNotFoundError, ValueError):
+        return 1
+
+
+def write_counter(path, value):
+    # Last writer wins; a stale counter only costs a few O_EXCL retries
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as file:
+        file.write(str(value))
+    os.replace(tmp, path)
+
+
+def make_file(name, ext=".traj", root=None):
+    root = get_root(root)
+    counters = os.path.join(root, COUNTERS)
+    os.makedirs(counters, exist_ok=True)
+    counter_path = os.path.join(counters, name)
+
+    counter = read_counter(counter_path)
+    while True:
+        run_id = f"{name}{counter}"
+        filepath = os.path.join(root, run_id + ext)
+        try:
+            fd = os.open(filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            counter += 1
+            continue
+        os.close(fd)
+        break
+
+    write_counter(counter_path, counter + 1)
+    return filepath
+
+
+def resolve(filename, root=None):
+    if os.path.dirname(filename):
+        return filename
+    return os.path.join(get_root(root), filename)
@@ -0,0 +1,100 @@
+from multiprocessing import shared_memory
+from delta import CELLS
+from MagicCube import MagicCube
+
+# Pools this process has attached to by name, so handles to the same pool
+# share one mapping
+ATTACHED = {}
+
+
+class StateHandle:
+    # One slot of a StatePool. A handle pickles to the pool's name and two
+    # ints, so it can be sent between processes in place of the state itself.
+    def __init__(self, name, slots, slot):
+        self.name = name
+        self.slots = slots
+        self.slot = slot
+
+    def pool(self):
+        if self.name not in ATTACHED:
+            ATTACHED[self.name] = StatePool(self.slots, name=self.name)
+        return ATTACHED[self.name]
+
+    def view(self):
+        return self.pool().view(self.slot)
+
+    def read(self):
+        return self.pool().read(self.slot)
+
+    def write(self, state):
+        self.pool().write(self.slot, state)
+
+    def cube(self):
+        return self.pool().cube(self.slot)
+
+    def __repr__(self):
+        return f"StateHandle({self.name!r}, {self.slots}, {self.slot})"
+
+
+def detach():
+    # Closes every pool this process attached to through a handle
+    for pool in list(ATTACHED.values()):
+        pool.close()
+
+
+class StatePool:
+    # `slots` cube states of CELLS bytes each (values 1..125 fit in a byte) in
+    # one shared memory block. The creating process owns the block and unlinks
+    # it; other processes attach by passing its `name`.
+    def __init__(self, slots, name=None):
+        self.slots = slots
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=slots * CELLS)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+        self.buffer = self.memory.buf
+
+    def __len__(self):
+        return self.slots
+
+    def handle(self, slot):
+        if not 0 <= slot < self.slots:
+            raise IndexError("State pool slot out of range")
+        return StateHandle(self.name, self.slots, slot)
+
+    def handles(self, start=0, stop=None):
+        return [self.handle(slot) for slot in range(start, self.slots if stop is None else stop)]
+
+    def view(self, slot):
+        # The slot's bytes in place; no copy is made
+        if not 0 <= slot < self.slots:
+            raise IndexError("State pool slot out of range")
+        return self.buffer[slot * CELLS:(slot + 1) * CELLS]
+
+    def read(self, slot):
+        return list(self.view(slot))
+
+    def write(self, slot, state):
+        # `state` is a MagicCube or a flat sequence of CELLS values
+        if isinstance(state, MagicCube):
+            state = state.flatten()
+        self.view(slot)[:] = bytes(state)
+
+    def cube(self, slot):
+        # MagicCube keeps nested lists, so this is the one copy out of the pool
+        return MagicCube.from_flat(self.view(slot))
+
+    def close(self):
+        ATTACHED.pop(self.name, None)
+        self.buffer = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
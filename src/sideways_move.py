@@ -1,21 +1,32 @@
-from MagicCube import MagicCube
-import matplotlib.pyplot as plt
+from MagicCube import MagicCube, NEIGHBORHOOD_SIZE, set_seed
+from trajectory import TrajectoryWriter
+from run_catalog import record_run
+from metrics import MetricRecorder
+from plotting import finish_figure, new_figure, plot_series
 import time
-import os
 
 class sideways_move:
-    def __init__(self, max_sideways_moves = 100):
-        self.list_of_value = []
+    def __init__(self, max_sideways_moves = 100, seed=None, budget=None, initializer="random"):
+        self.seed = seed
+        self.initializer = initializer
+        self.budget = budget
+        self.list_of_value = MetricRecorder()
         self.max_sideways_moves = max_sideways_moves
         self.iteration = 0
         self.duration = 0
         self.total_sideways = 0
-        self.filepath = self.make_file("sidewaysmove")
+        self.filepath = None
     
-    def run(self):
+    def run(self, plot=True):
         start_time = time.time()
+        if self.seed is not None:
+            set_seed(self.seed)
+        self.trajectory = TrajectoryWriter(name="sidewaysmove")
+        self.filepath = self.trajectory.filepath
+        if self.budget is not None:
+            self.budget.start()
 
-        current = MagicCube()
+        current = MagicCube(initializer=self.initializer)
         self.list_of_value.append(current.value)
         current.print_cube()
         i = 0
@@ -25,6 +36,8 @@ class sideways_move:
             successor = current.get_successor("best")
     
             if successor.value == current.value:
+                if sideways_moves == 0:
+                    self.trajectory.mark("sideways", value=current.value)
                 sideways_moves += 1
             elif successor.value < current.value:
                 break
@@ -33,9 +46,14 @@ class sideways_move:
                 
             current = successor
             self.list_of_value.append(current.value)
-            current.save_state(self.filepath)
+            self.trajectory.append(current)
             i += 1
+            if self.budget is not None and self.budget.update(current.value, NEIGHBORHOOD_SIZE):
+                break
 
+        self.trajectory.close()
+        if self.budget is not None and self.budget.exhausted():
+            print(f"Stopped by budget: {self.budget.stop_reason}")
         current.print_cube()
         self.duration = time.time() - start_time
         self.iteration = i
@@ -43,46 +61,35 @@ class sideways_move:
         print(self.duration)
         print(self.iteration)
         print(f"Total sideways moves: {sideways_moves}")
-        self.makePlot()
+        record_run("sideways_move", self.filepath, {"max_sideways_moves": self.max_sideways_moves,
+                                                     "initializer": self.initializer},
+                   self.seed, start_time, time.time(), self.list_of_value.first, current.value, self.iteration,
+                   current)
+        if plot:
+            self.makePlot()
 
-    def makePlot(self):
-        plt.figure(figsize=(12, 8))
+    def makePlot(self, output=None):
+        fig = new_figure((12, 8), output)
         
-        plt.subplot(2, 1, 1)
-        plt.plot(list(range(len(self.list_of_value))), self.list_of_value)
-        plt.title("Magic Cube Value over Iterations")
-        plt.xlabel("Iteration")
-        plt.ylabel("Value")
-        plt.grid(True)
+        ax = fig.add_subplot(2, 1, 1)
+        plot_series(ax, *self.list_of_value.series())
+        ax.set_title("Magic Cube Value over Iterations")
+        ax.set_xlabel("Iteration")
+        ax.set_ylabel("Value")
+        ax.grid(True)
         
-        plt.subplot(2, 1, 2)
-        plt.axis('off')
+        ax = fig.add_subplot(2, 1, 2)
+        ax.axis('off')
         info_text = (
-            f"Initial Value: {self.list_of_value[0]}\n"
-            f"Final Value: {self.list_of_value[-1]}\n"
+            f"Initial Value: {self.list_of_value.first}\n"
+            f"Final Value: {self.list_of_value.last}\n"
             f"Total Iterations: {self.iteration}\n"
             f"Total sideways: {self.total_sideways}\n"
             f"Duration: {self.duration:.2f} seconds"
         )
-        plt.text(0.1, 0.5, info_text, fontsize=12, verticalalignment='center')
-        
-        plt.tight_layout()
-        plt.show()
-
-    def make_file(self, name):
-        directory = ".\\save_file"
-        os.makedirs(directory, exist_ok=True)
-        
-        counter = 1
-        while True:
-            filename = f"{name}{counter}.txt"
-            filepath = os.path.join(directory, filename)
-            
-            if not os.path.exists(filepath):
-                break
-            counter += 1
+        ax.text(0.1, 0.5, info_text, fontsize=12, verticalalignment='center')
         
-        return filepath
+        finish_figure(fig, output)
 
 if __name__ == "__main__":
     S = sideways_move()
@@ -1,204 +1,340 @@
 import random
 import math
-import time
-import matplotlib.pyplot as plt
-import numpy as np
-from MagicCube import MagicCube
 import os
+import time
+from MagicCube import MagicCube, set_seed
+from trajectory import TrajectoryWriter
+from run_catalog import record_run
+from checkpoint import Checkpointer, load_checkpoint, restore_rng
+from metrics import MetricRecorder, MovingAverage
+from plotting import finish_figure, moving_average, new_figure, plot_series
+from cooling import BestValueReheat, BlockStats, LegacySchedule, calibrate_initial_temperature
+from delta import MAX_LOSS, apply_swap, line_sums, random_swap, swap_delta
 
 class SimulatedAnnealing:
-    def __init__(self, initial_temp=1000000.0, cooling_rate=0.99995, min_temp=0.0001, max_iterations=500000):
+    def __init__(self, initial_temp=1000000.0, cooling_rate=0.99995, min_temp=0.0001, max_iterations=500000, seed=None,
+                 checkpoint_interval=None, checkpoint_path=None, filepath=None, budget=None,
+                 schedule=None, reheat=None, initializer="random", stuck_threshold=175000):
+        self.initializer = initializer
         self.initial_temp = initial_temp
         self.cooling_rate = cooling_rate
+        self.schedule = schedule or LegacySchedule(cooling_rate)
+        self.reheat = reheat or BestValueReheat()
         self.min_temp = min_temp
         self.max_iterations = max_iterations
-        self.objective_values = []
-        self.temperatures = []
-        self.exp_deltaE_T = []
-        self.stuck_count = 0
-        self.stuck_threshold = 175000  
-        self.duration = 0
+        self.seed = seed
+        self.budget = budget
+        self.stuck_threshold = stuck_threshold
+        self.reset()
         self.initial_state = None
         self.final_state = None
-        self.filepath = self.make_file("simulatedannealing")
+        # None: a new save file is reserved when a run starts writing
+        self.filepath = filepath
+        self.checkpoint_interval = checkpoint_interval
+        # None: the save file's path plus ".ckpt"
+        self.checkpoint_path = checkpoint_path
+
+    def reset(self):
+        self.objective_values = MetricRecorder()
+        self.temperatures = MetricRecorder()
+        self.exp_deltaE_T = MetricRecorder("reservoir")
+        self.moving_average = MetricRecorder()
+        self.moving_average_window = MovingAverage(1000)
+        self.stuck_count = 0
+        self.duration = 0
+        self.total_iterations = 0
+
+    def params(self):
+        return {
+            "initial_temp": self.initial_temp,
+            "cooling_rate": self.cooling_rate,
+            "min_temp": self.min_temp,
+            "max_iterations": self.max_iterations,
+            "stuck_threshold": self.stuck_threshold,
+            "schedule": self.schedule.describe(),
+            "reheat": self.reheat.describe(),
+            "initializer": self.initializer,
+        }
     
-    def accept_probability(self, current_value, neighbor_value, temperature):
-        if neighbor_value >= current_value:
-            return 1.0
-        delta_E = neighbor_value - current_value
-        if temperature > self.initial_temp * 0.8:
-            prob = math.exp(delta_E / (temperature * 0.01)) 
-        elif temperature > self.initial_temp * 0.4:
-            prob = math.exp(delta_E / (temperature * 0.05)) 
-        else:
-            prob = math.exp(delta_E / temperature) 
-        self.exp_deltaE_T.append(prob)
-        return prob
+    def acceptance_table(self, temperature, initial_temp):
+        # Value deltas are small integers, so e^(ΔE/T) only has MAX_LOSS distinct
+        # values per temperature; table[-ΔE] replaces a math.exp call per proposal
+        t = self.schedule.effective(temperature, initial_temp)
+        return [math.exp(-loss / t) for loss in range(MAX_LOSS + 1)]
+
+    def record(self, value, temperature):
+        self.objective_values.append(value)
+        self.temperatures.append(temperature)
+        average = self.moving_average_window.update(value)
+        if self.moving_average_window.full():
+            self.moving_average.append(average)
     
-    def run(self, magic_cube):
+    def run(self, magic_cube, resume_state=None):
         start_time = time.time()
-        
-        current = MagicCube(magic_cube.cube)
-        self.initial_state = current.cube
-        best = MagicCube(current.cube)
+        if resume_state is None:
+            if self.seed is not None:
+                set_seed(self.seed)
+            self.reset()
+            self.schedule.start()
+            self.trajectory = TrajectoryWriter(self.filepath, name="simulatedannealing")
 
-        current.print_cube()
-        
-        temperature = self.initial_temp
-        iterations_without_improvement = 0
-        total_iterations = 0
-        plateau_count = 0
-        
-        while temperature > self.min_temp and total_iterations < self.max_iterations:
+            self.initial_state = magic_cube.cube
+            current = magic_cube.flatten()
+            best = current[:]
+            value = best_value = magic_cube.value
+
+            magic_cube.print_cube()
+
+            # "auto" is calibrated for every run from its own start state; the
+            # configured value stays as given for params() and the next run
+            initial_temp = self.initial_temp
+            if initial_temp == "auto":
+                initial_temp = calibrate_initial_temperature(current) / self.schedule.start_scale
+                print(f"Calibrated initial temperature: {initial_temp:.4g}")
+            temperature = initial_temp
+            iterations_without_improvement = 0
+            total_iterations = 0
+            plateau_count = 0
+        else:
+            self.trajectory = TrajectoryWriter(self.filepath, length=resume_state["trajectory_length"])
+            start_time -= resume_state["elapsed"]
+            self.initial_state = magic_cube.cube
+            current = resume_state["current"]
+            best = resume_state["best"]
+            value = MagicCube.from_flat(current).value
+            best_value = MagicCube.from_flat(best).value
+            temperature = resume_state["temperature"]
+            initial_temp = resume_state.get("initial_temp", self.initial_temp)
+            iterations_without_improvement = resume_state["iterations_without_improvement"]
+            total_iterations = resume_state["total_iterations"]
+            plateau_count = resume_state["plateau_count"]
+            self.stuck_count = resume_state["stuck_count"]
+            self.objective_values = resume_state["objective_values"]
+            self.temperatures = resume_state["temperatures"]
+            self.exp_deltaE_T = resume_state["exp_deltaE_T"]
+            self.moving_average = resume_state["moving_average"]
+            self.moving_average_window = resume_state["moving_average_window"]
+            restore_rng(resume_state["rng"])
+
+        self.filepath = self.trajectory.filepath
+        checkpointer = None
+        if self.checkpoint_interval is not None:
+            checkpointer = Checkpointer(self.checkpoint_path or self.filepath + ".ckpt", self.checkpoint_interval)
+
+        if self.budget is not None:
+            self.budget.start()
+
+        sums = line_sums(current)
+        out_of_budget = False
+        while temperature > self.min_temp and total_iterations < self.max_iterations and not out_of_budget:
+            table = self.acceptance_table(temperature, initial_temp)
+            stats = BlockStats()
             for _ in range(300):  
                 if total_iterations >= self.max_iterations:
                     break
-                    
-                best_neighbor = None
-                best_neighbor_value = float('-inf')
                 
+                # Score 10 random swaps by their change in value, without building cubes
+                best_delta = -MAX_LOSS - 1
                 for _ in range(10):  
-                    neighbor = current.get_successor("random")
-                    if neighbor.value > best_neighbor_value:
-                        best_neighbor = neighbor
-                        best_neighbor_value = neighbor.value
+                    a, b = random_swap()
+                    delta = swap_delta(current, sums, a, b)
+                    if delta > best_delta:
+                        best_delta = delta
+                        best_swap = (a, b)
                 
-                if self.accept_probability(current.value, best_neighbor.value, temperature) > random.random():
-                    current = best_neighbor
+                if best_delta >= 0:
+                    accepted = True
+                else:
+                    prob = table[-best_delta]
+                    self.exp_deltaE_T.append(prob)
+                    accepted = prob > random.random()
+                    stats.worsening += 1
+                    stats.accepted_worsening += accepted
+
+                if accepted:
+                    apply_swap(current, sums, *best_swap)
+                    value += best_delta
                     
-                    if current.value > best.value:
-                        best = MagicCube(current.cube)
+                    if value > best_value:
+                        best = current[:]
+                        best_value = value
                         iterations_without_improvement = 0
                         plateau_count = 0
-                    elif current.value == best.value:
+                    elif value == best_value:
                         plateau_count += 1
                     else:
                         iterations_without_improvement += 1
                 else:
                     iterations_without_improvement += 1
                 
-                current.save_state(self.filepath)
-                self.objective_values.append(current.value)
-                self.temperatures.append(temperature)
+                self.trajectory.append(current, value)
+                self.record(value, temperature)
                 total_iterations += 1
+                if self.budget is not None and self.budget.update(value, 10):
+                    out_of_budget = True
+                    break
             
+            stats.best_value = best_value
+            stats.plateau_count = plateau_count
+            reheat_temp = None
             if iterations_without_improvement >= self.stuck_threshold:
+                reheat_temp = self.reheat.temperature(initial_temp, best_value)
+
+            if reheat_temp is not None:
                 self.stuck_count += 1
-                if best.value < 40:
-                    temperature = self.initial_temp * 0.95  
-                elif best.value < 60:
-                    temperature = self.initial_temp * 0.8  
-                elif best.value < 80:
-                    temperature = self.initial_temp * 0.6  
-                else:
-                    temperature = self.initial_temp * 0.4  
+                temperature = reheat_temp
+                self.trajectory.mark("reheat", temperature=temperature, best_value=best_value)
                 
                 iterations_without_improvement = 0
                 plateau_count = 0
-                current = MagicCube(best.cube)
-                modifications = max(2, min(8, int(80 - best.value)))  
+                current = best[:]
+                sums = line_sums(current)
+                value = best_value
+                modifications = max(2, min(8, int(80 - best_value)))  
                 for _ in range(modifications):
-                    current = current.get_successor("random")
+                    a, b = random_swap()
+                    value += swap_delta(current, sums, a, b)
+                    apply_swap(current, sums, a, b)
             else:
-                if plateau_count > 10000:  
-                    temperature *= (self.cooling_rate ** 2)     
-                elif best.value > 80:
-                    temperature *= (self.cooling_rate ** 0.1)    
-                elif best.value > 60:
-                    temperature *= (self.cooling_rate ** 0.25)  
-                elif best.value > 40:
-                    temperature *= (self.cooling_rate ** 0.5)    
-                else:
-                    temperature *= self.cooling_rate
+                temperature = self.schedule.cool(temperature, stats)
+
+            if checkpointer is not None and checkpointer.due():
+                self.trajectory.flush()
+                checkpointer.save({
+                    "algorithm": "simulated_annealing",
+                    "params": self.params(),
+                    "seed": self.seed,
+                    "filepath": self.filepath,
+                    "checkpoint_interval": self.checkpoint_interval,
+                    "trajectory_length": len(self.trajectory),
+                    "elapsed": time.time() - start_time,
+                    "initial_state": self.initial_state,
+                    "current": current,
+                    "best": best,
+                    "temperature": temperature,
+                    "initial_temp": initial_temp,
+                    "iterations_without_improvement": iterations_without_improvement,
+                    "total_iterations": total_iterations,
+                    "plateau_count": plateau_count,
+                    "stuck_count": self.stuck_count,
+                    "schedule": self.schedule,
+                    "reheat": self.reheat,
+                    "objective_values": self.objective_values,
+                    "temperatures": self.temperatures,
+                    "exp_deltaE_T": self.exp_deltaE_T,
+                    "moving_average": self.moving_average,
+                    "moving_average_window": self.moving_average_window,
+                })
 
-        current.print_cube()
+        self.trajectory.close()
+        if checkpointer is not None:
+            checkpointer.remove()
+        if out_of_budget:
+            print(f"Stopped by budget: {self.budget.stop_reason}")
+        MagicCube.from_flat(current).print_cube()
+        best = MagicCube.from_flat(best)
         self.final_state = best.cube
         self.duration = time.time() - start_time
+        self.total_iterations = total_iterations
+        record_run("simulated_annealing", self.filepath, self.params(), self.seed, start_time,
+                   start_time + self.duration, magic_cube.value, best.value, total_iterations,
+                   best)
         return best
 
-    def make_file(self, name):
-        directory = ".\\save_file"
-        os.makedirs(directory, exist_ok=True)
-        
-        counter = 1
-        while True:
-            filename = f"{name}{counter}.txt"
-            filepath = os.path.join(directory, filename)
-            
-            if not os.path.exists(filepath):
-                break
-            counter += 1
-        
-        return filepath
+    @classmethod
+    def resume(cls, checkpoint_path):
+        state = load_checkpoint(checkpoint_path)
+        params = dict(state["params"])
+        del params["schedule"], params["reheat"]
+        sa = cls(**params, seed=state["seed"], filepath=state["filepath"],
+                 checkpoint_interval=state["checkpoint_interval"], checkpoint_path=checkpoint_path,
+                 schedule=state["schedule"], reheat=state["reheat"])
+        print(f"Resuming {state['filepath']} at iteration {state['total_iterations']}")
+        return sa.run(MagicCube(state["initial_state"]), resume_state=state)
 
-    def run_experiments(self, n_experiments):
+    def run_experiments(self, n_experiments, output_dir=None):
+        # Every experiment is a run of this annealer with its settings, seeded
+        # seed + n; only the first goes to a configured filepath, the rest get
+        # save files of their own
         all_results = []
+        seed, checkpoint_path = self.seed, self.checkpoint_path
         for exp in range(n_experiments):
             print(f"\nRunning experiment {exp+1}")
             
-            sa = SimulatedAnnealing(
-                initial_temp=1000000.0,
-                cooling_rate=0.99995,
-                min_temp=0.0001,
-                max_iterations=1000
-            )
-            magic_cube = MagicCube()
+            self.seed = None if seed is None else seed + exp
+            if exp > 0:
+                self.filepath = self.checkpoint_path = None
+            if self.seed is not None:
+                set_seed(self.seed)
+            magic_cube = MagicCube(initializer=self.initializer)
             initial_value = magic_cube.value
-            best_solution = sa.run(magic_cube)
+            best_solution = self.run(magic_cube)
             result = {
                 'experiment': exp + 1,
-                'initial_state': sa.initial_state,
-                'final_state': sa.final_state,
+                'initial_state': self.initial_state,
+                'final_state': self.final_state,
                 'initial_value': initial_value,
                 'final_value': best_solution.value,
-                'objective_values': sa.objective_values,
-                'temperatures': sa.temperatures,
-                'exp_deltaE_T': sa.exp_deltaE_T,
-                'stuck_count': sa.stuck_count,
-                'duration': sa.duration
+                'objective_values': self.objective_values,
+                'temperatures': self.temperatures,
+                'exp_deltaE_T': self.exp_deltaE_T,
+                'moving_average': self.moving_average,
+                'moving_average_window': self.moving_average_window.window,
+                'stuck_count': self.stuck_count,
+                'duration': self.duration,
+                'filepath': self.filepath
             }
             all_results.append(result)
-            visualize_experiment(result)
+            output = None
+            if output_dir is not None:
+                output = os.path.join(output_dir, os.path.basename(self.filepath) + ".png")
+            visualize_experiment(result, output)
+        self.seed, self.checkpoint_path = seed, checkpoint_path
         
         if (n_experiments > 1):
-            visualize_summary(all_results)
-            return all_results
+            output = None if output_dir is None else os.path.join(output_dir, "summary.png")
+            visualize_summary(all_results, output)
+        return all_results
 
-def visualize_experiment(result):
-    plt.figure(figsize=(15, 10))
+def visualize_experiment(result, output=None):
+    import numpy as np
+    fig = new_figure((15, 10), output)
     
-    plt.subplot(2, 2, 1)
-    plt.plot(result['objective_values'], 'b-', alpha=0.6)
-    plt.title('Objective Function Value vs Iterations')
-    plt.xlabel('Iteration')
-    plt.ylabel('Value')
-    plt.grid(True)
+    ax = fig.add_subplot(2, 2, 1)
+    values = result['objective_values']
+    plot_series(ax, *values.series(), 'b-', alpha=0.6)
+    ax.set_title('Objective Function Value vs Iterations')
+    ax.set_xlabel('Iteration')
+    ax.set_ylabel('Value')
+    ax.grid(True)
     
-    window = 1000
-    if len(result['objective_values']) > window:
-        moving_avg = np.convolve(result['objective_values'], 
-                               np.ones(window)/window, 
-                               mode='valid')
-        plt.plot(range(window-1, len(result['objective_values'])), 
-                moving_avg, 'r-', linewidth=2, 
-                label=f'Moving Average (window={window})')
-        plt.legend()
+    window = result['moving_average_window']
+    if values.strategy == "all":
+        moving_avg = moving_average(values.values(), window)
+        moving_x = np.arange(window - 1, window - 1 + len(moving_avg))
+    else:
+        x, moving_avg = result['moving_average'].series()
+        moving_x = np.asarray(x) + window - 1
+    if len(moving_avg) > 0:
+        plot_series(ax, moving_x, moving_avg, 'r-', linewidth=2, 
+                    label=f'Moving Average (window={window})')
+        ax.legend()
     
-    plt.subplot(2, 2, 2)
-    plt.plot(result['temperatures'])
-    plt.title('Temperature vs Iterations')
-    plt.xlabel('Iteration')
-    plt.ylabel('Temperature')
-    plt.grid(True)
-    plt.yscale('log')
-    plt.subplot(2, 2, 3)
-    plt.plot(result['exp_deltaE_T'])
-    plt.title('e^(ΔE/T) vs Iterations')
-    plt.xlabel('Iteration')
-    plt.ylabel('e^(ΔE/T)')
-    plt.grid(True)
-    plt.subplot(2, 2, 4)
-    plt.axis('off')
+    ax = fig.add_subplot(2, 2, 2)
+    plot_series(ax, *result['temperatures'].series())
+    ax.set_title('Temperature vs Iterations')
+    ax.set_xlabel('Iteration')
+    ax.set_ylabel('Temperature')
+    ax.grid(True)
+    ax.set_yscale('log')
+    ax = fig.add_subplot(2, 2, 3)
+    plot_series(ax, *result['exp_deltaE_T'].series(), method="lttb")
+    ax.set_title('e^(ΔE/T) vs Non-improving Proposals')
+    ax.set_xlabel('Non-improving Proposal')
+    ax.set_ylabel('e^(ΔE/T)')
+    ax.grid(True)
+    ax = fig.add_subplot(2, 2, 4)
+    ax.axis('off')
     info_text = (
         f"Experiment {result['experiment']}\n\n"
         f"Initial Value: {result['initial_value']}\n"
@@ -207,45 +343,45 @@ def visualize_experiment(result):
         f"Times Stuck: {result['stuck_count']}\n"
         f"Duration: {result['duration']:.2f} seconds"
     )
-    plt.text(0.1, 0.5, info_text, fontsize=12)
-    plt.tight_layout()
-    plt.show()
+    ax.text(0.1, 0.5, info_text, fontsize=12)
+    finish_figure(fig, output)
     print("\nInitial State:")
     MagicCube(result['initial_state']).print_cube()
     print("\nFinal State:")
     MagicCube(result['final_state']).print_cube()
 
-def visualize_summary(results):
-    plt.figure(figsize=(15, 10))
-    plt.subplot(2, 2, 1)
+def visualize_summary(results, output=None):
+    import numpy as np
+    fig = new_figure((15, 10), output)
+    ax = fig.add_subplot(2, 2, 1)
     final_values = [r['final_value'] for r in results]
-    plt.bar(range(1, len(results) + 1), final_values, color='skyblue')
-    plt.title('Final Values Across Experiments')
-    plt.xlabel('Experiment')
-    plt.ylabel('Value')
-    plt.grid(True)
+    ax.bar(range(1, len(results) + 1), final_values, color='skyblue')
+    ax.set_title('Final Values Across Experiments')
+    ax.set_xlabel('Experiment')
+    ax.set_ylabel('Value')
+    ax.grid(True)
     
     for i, v in enumerate(final_values):
-        plt.text(i + 1, v, str(v), ha='center', va='bottom')
+        ax.text(i + 1, v, str(v), ha='center', va='bottom')
     
-    plt.subplot(2, 2, 2)
+    ax = fig.add_subplot(2, 2, 2)
     durations = [r['duration'] for r in results]
-    plt.bar(range(1, len(results) + 1), durations, color='lightgreen')
-    plt.title('Duration of Experiments')
-    plt.xlabel('Experiment')
-    plt.ylabel('Seconds')
-    plt.grid(True)
+    ax.bar(range(1, len(results) + 1), durations, color='lightgreen')
+    ax.set_title('Duration of Experiments')
+    ax.set_xlabel('Experiment')
+    ax.set_ylabel('Seconds')
+    ax.grid(True)
     
-    plt.subplot(2, 2, 3)
+    ax = fig.add_subplot(2, 2, 3)
     stuck_counts = [r['stuck_count'] for r in results]
-    plt.bar(range(1, len(results) + 1), stuck_counts, color='salmon')
-    plt.title('Times Stuck in Local Optima')
-    plt.xlabel('Experiment')
-    plt.ylabel('Count')
-    plt.grid(True)
+    ax.bar(range(1, len(results) + 1), stuck_counts, color='salmon')
+    ax.set_title('Times Stuck in Local Optima')
+    ax.set_xlabel('Experiment')
+    ax.set_ylabel('Count')
+    ax.grid(True)
     
-    plt.subplot(2, 2, 4)
-    plt.axis('off')
+    ax = fig.add_subplot(2, 2, 4)
+    ax.axis('off')
     summary_text = (
         f"Summary Statistics\n\n"
         f"Average Final Value: {np.mean(final_values):.2f}\n"
@@ -254,7 +390,6 @@ def visualize_summary(results):
         f"Average Times Stuck: {np.mean(stuck_counts):.2f}\n"
         f"Total Experiments: {len(results)}"
     )
-    plt.text(0.1, 0.5, summary_text, fontsize=12)
+    ax.text(0.1, 0.5, summary_text, fontsize=12)
     
-    plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    finish_figure(fig, output)
@@ -0,0 +1,119 @@
+import importlib
+import inspect
+import json
+import os
+import time
+from contextlib import redirect_stdout
+from budget import Budget
+from run_storage import set_root
+
+# name -> (module, class); modules are only imported when first used
+ALGORITHMS = {
+    "steepest_ascent": ("steepest_ascent", "steepest_ascent"),
+    "sideways_move": ("sideways_move", "sideways_move"),
+    "stochastic": ("stochastic", "stochastic"),
+    "random_restart": ("random_restart", "random_restart_hill_climbing"),
+    "simulated_annealing": ("simulated_annealing", "SimulatedAnnealing"),
+    "genetic_algorithm": ("genetic_algorithm", "GeneticAlgorithm"),
+    "late_acceptance": ("late_acceptance", "late_acceptance"),
+    "great_deluge": ("great_deluge", "great_deluge"),
+}
+
+ALIASES = {
+    "steepest": "steepest_ascent",
+    "sideways": "sideways_move",
+    "rr": "random_restart",
+    "sa": "simulated_annealing",
+    "ga": "genetic_algorithm",
+    "lahc": "late_acceptance",
+    "gd": "great_deluge",
+}
+
+# Arguments of GeneticAlgorithm.run_islands rather than of the constructor
+ISLAND_PARAMS = ("islands", "migration_interval", "migrants")
+
+
+def algorithm_name(algorithm):
+    name = ALIASES.get(algorithm, algorithm)
+    if name not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    return name
+
+
+def parse_param(text):
+    # "key=value" from the command line; value is JSON when it parses as JSON
+    key, _, value = text.partition("=")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def load(algorithm):
+    module, name = ALGORITHMS[algorithm_name(algorithm)]
+    return getattr(importlib.import_module(module), name)
+
+
+def warm_up():
+    # Imports every algorithm (and with them NumPy and the line tables) so the
+    # first job does not pay for it
+    for algorithm in ALGORITHMS:
+        load(algorithm)
+
+
+def make_budget(budget=None, progress=None):
+    if not isinstance(budget, Budget):
+        budget = Budget(**(budget or {}))
+    if progress is not None:
+        budget.progress = progress
+    return budget
+
+
+def start(algorithm, runner, params, seed):
+    if algorithm in ("simulated_annealing", "genetic_algorithm"):
+        from MagicCube import MagicCube, set_seed
+        if seed is not None:
+            set_seed(seed)
+        initial = MagicCube(initializer=runner.initializer)
+        if algorithm == "simulated_annealing":
+            runner.run(initial)
+        elif params.get("islands", 1) > 1:
+            runner.run_islands(initial, plot=False, **params)
+        else:
+            runner.run(initial, plot=False)
+    else:
+        runner.run(plot=False)
+
+
+def solve(algorithm, params=None, seed=None, budget=None, progress=None, root=None, quiet=False):
+    # Runs one algorithm without plots and returns its catalog record plus the
+    # budget's stop reason. `budget` is a Budget or a dict of Budget arguments,
+    # `progress` is called with Budget.snapshot() while the run goes on and
+    # `root` is the output directory (the default root when None).
+    algorithm = algorithm_name(algorithm)
+    params = dict(params or {})
+    run_params = {key: params.pop(key) for key in ISLAND_PARAMS if key in params}
+    budget = make_budget(budget, progress)
+    set_root(root)
+
+    from run_catalog import get_run
+    runner_class = load(algorithm)
+    accepted = inspect.signature(runner_class).parameters
+    for key in params:
+        if key in ("seed", "budget"):
+            raise ValueError(f"Pass {key} as its own argument to solve, not as a parameter")
+        if key not in accepted:
+            raise ValueError(f"Unknown parameter for {algorithm}: {key}")
+    runner = runner_class(**params, seed=seed, budget=budget)
+    started = time.time()
+    if quiet:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            start(algorithm, runner, run_params, seed)
+    else:
+        start(algorithm, runner, run_params, seed)
+
+    run_id = os.path.splitext(os.path.basename(runner.filepath))[0]
+    result = get_run(run_id) or {"run_id": run_id, "path": runner.filepath}
+    result["stop_reason"] = budget.stop_reason
+    result["wall_time"] = time.time() - started
+    return result
@@ -0,0 +1,239 @@
+import argparse
+import ipaddress
+import itertools
+import json
+import os
+import secrets
+import signal
+import socket
+import sys
+import threading
+from multiprocessing import AuthenticationError, Process, Queue
+from multiprocessing.connection import Client, Listener
+from run_storage import get_root
+from solver import parse_param
+
+ADDRESS = ("localhost", 6150)
+
+
+def key_path(port):
+    return os.path.join(get_root(), f".solver_service.{port}.key")
+
+
+def write_key(path, authkey):
+    # Connections carry pickles, so the key is readable by the service's
+    # user only
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    with os.fdopen(fd, "w") as file:
+        file.write(authkey.hex())
+    os.replace(tmp, path)
+
+
+def read_key(port):
+    path = key_path(port)
+    try:
+        with open(path, "r") as file:
+            return bytes.fromhex(file.read().strip())
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No service key at {path}; is the service running?") from None
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def worker_loop(jobs, events):
+    # A warm worker: pays for imports and line tables once, then runs jobs
+    # until it reads None. Ctrl-C is left to the service, which shuts workers
+    # down through the queue.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from solver import solve, warm_up
+    warm_up()
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id = job["id"]
+        events.put(("started", job_id, None))
+
+        def progress(snapshot):
+            events.put(("progress", job_id, snapshot))
+
+        try:
+            result = solve(job["algorithm"], job.get("params"), job.get("seed"), job.get("budget"),
+                           progress, job.get("root"), quiet=True)
+        except Exception as e:
+            events.put(("error", job_id, f"{type(e).__name__}: {e}"))
+        else:
+            events.put(("done", job_id, result))
+
+
+class SolverService:
+    # Jobs are dicts with "algorithm" and optional "params", "seed", "budget"
+    # (Budget arguments, including progress_interval) and "root". At most
+    # `workers` jobs run at once; the rest wait in order in the job queue.
+    # Without an `authkey` a random one is made and written to key_path(port)
+    # for local clients while the service runs.
+    def __init__(self, workers=2, address=ADDRESS, authkey=None):
+        self.address = address
+        self.key_file = None
+        if authkey is None:
+            authkey = secrets.token_bytes(32)
+            self.key_file = key_path(address[1])
+        self.authkey = authkey
+        self.jobs = Queue()
+        self.events = Queue()
+        self.workers = [Process(target=worker_loop, args=(self.jobs, self.events))
+                        for _ in range(workers)]
+        self.callbacks = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        self.dispatcher.start()
+        return self
+
+    def submit(self, job, callback):
+        # callback(kind, job_id, payload) gets "started", "progress" (a budget
+        # snapshot), then "done" (the run's catalog record) or "error"
+        job_id = next(self.ids)
+        with self.lock:
+            self.callbacks[job_id] = callback
+        self.jobs.put(dict(job, id=job_id))
+        return job_id
+
+    def dispatch(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                break
+            kind, job_id, payload = event
+            with self.lock:
+                if kind in ("done", "error"):
+                    callback = self.callbacks.pop(job_id, None)
+                else:
+                    callback = self.callbacks.get(job_id)
+            if callback is not None:
+                callback(kind, job_id, payload)
+
+    def handle(self, conn):
+        send_lock = threading.Lock()
+
+        def forward(kind, job_id, payload):
+            try:
+                with send_lock:
+                    conn.send((kind, job_id, payload))
+            except OSError:
+                pass
+
+        try:
+            while True:
+                command, job = conn.recv()
+                if command == "solve":
+                    self.submit(job, forward)
+        except (EOFError, OSError):
+            pass
+
+    def serve(self):
+        with Listener(self.address, authkey=self.authkey) as listener:
+            if self.key_file is not None:
+                write_key(self.key_file, self.authkey)
+            print(f"Solver service on {self.address[0]}:{self.address[1]} "
+                  f"with {len(self.workers)} workers")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, EOFError, OSError):
+                    # A client with the wrong key, or one that hung up mid-handshake
+                    continue
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def close(self):
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.events.put(None)
+        self.dispatcher.join()
+        if self.key_file is not None and os.path.exists(self.key_file):
+            os.remove(self.key_file)
+
+
+def submit(job, address=ADDRESS, authkey=None, progress=None):
+    # Sends one job to a running service, calls progress(snapshot) as it runs
+    # and returns the finished run's catalog record. Without an `authkey` the
+    # key the service wrote for its port is used.
+    if authkey is None:
+        authkey = read_key(address[1])
+    with Client(address, authkey=authkey) as conn:
+        conn.send(("solve", job))
+        while True:
+            kind, _, payload = conn.recv()
+            if kind == "progress" and progress is not None:
+                progress(payload)
+            elif kind == "done":
+                return payload
+            elif kind == "error":
+                raise RuntimeError(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived Magic Cube solver service")
+    parser.add_argument("--host", default=ADDRESS[0])
+    parser.add_argument("--port", type=int, default=ADDRESS[1])
+    parser.add_argument("--authkey", help="shared key; required to serve on a non-loopback host "
+                                           "(default: a random key kept in the output directory)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="start warm workers and accept jobs")
+    serve_parser.add_argument("--workers", type=int, default=2)
+
+    submit_parser = subparsers.add_parser("submit", help="run one job on a running service")
+    submit_parser.add_argument("--algo", required=True)
+    submit_parser.add_argument("--seed", type=int)
+    submit_parser.add_argument("--param", action="append", default=[], metavar="KEY=VALUE")
+    submit_parser.add_argument("--time-limit", type=float)
+    submit_parser.add_argument("--max-evaluations", type=int)
+    submit_parser.add_argument("--target", type=int)
+    submit_parser.add_argument("--root", help="output directory for the run")
+
+    args = parser.parse_args()
+    address = (args.host, args.port)
+    authkey = None if args.authkey is None else args.authkey.encode()
+    if args.command == "serve":
+        if authkey is None and not is_loopback(args.host):
+            parser.error("--authkey is required to serve on a non-loopback host")
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        service = SolverService(args.workers, address, authkey).start()
+        try:
+            service.serve()
+        except KeyboardInterrupt:
+            print("\nStopping workers...")
+        finally:
+            service.close()
+    else:
+        budget = {"time_limit": args.time_limit, "max_evaluations": args.max_evaluations,
+                  "target_value": args.target}
+        job = {
+            "algorithm": args.algo,
+            "params": dict(parse_param(param) for param in args.param),
+            "seed": args.seed,
+            "budget": {key: value for key, value in budget.items() if value is not None},
+            "root": args.root,
+        }
+        try:
+            result = submit(job, address, authkey, progress=lambda snapshot: print(json.dumps(snapshot)))
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
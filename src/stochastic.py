@@ -1,77 +1,111 @@
-from MagicCube import MagicCube
-import matplotlib.pyplot as plt
+from MagicCube import MagicCube, set_seed
+from trajectory import TrajectoryWriter
+from run_catalog import record_run
+from metrics import MetricRecorder
+from plotting import finish_figure, new_figure, plot_series
+from delta import line_sums
+from moves import BatchedSwaps, apply_swap, batch_swap_delta
+import numpy as np
+import random
 import time
-import os
 
 class stochastic:
-    def __init__(self, max_iterations=100000):
+    def __init__(self, max_iterations=100000, seed=None, budget=None, block_size=4096,
+                 initializer="random"):
+        self.seed = seed
+        self.initializer = initializer
+        self.budget = budget
         self.max_iterations = max_iterations
-        self.list_of_value = []
+        self.block_size = block_size
+        self.list_of_value = MetricRecorder()
         self.iteration = 0
         self.duration = 0
-        self.filepath = self.make_file("stochastic")
+        self.filepath = None
     
-    def run(self):
+    def run(self, plot=True):
         start_time = time.time()
+        if self.seed is not None:
+            set_seed(self.seed)
+        self.trajectory = TrajectoryWriter(name="stochastic")
+        self.filepath = self.trajectory.filepath
+        if self.budget is not None:
+            self.budget.start()
 
-        current = MagicCube()
+        current = MagicCube(initializer=self.initializer)
         self.list_of_value.append(current.value)
         current.print_cube()
         it = 0
 
-        for i in range(self.max_iterations):
-            successor = current.get_successor("random")
-            if successor.value > current.value:
-                current = successor
-                
-            self.list_of_value.append(current.value)
-            current.save_state(self.filepath)
-            it += 1
+        # Score whole blocks of random swaps by delta at once; only the first
+        # improving swap of a block is applied and saved, everything before it
+        # was rejected and leaves the state unchanged
+        rng = np.random.default_rng(random.getrandbits(64))
+        swaps = BatchedSwaps(rng, self.block_size)
+        flat = np.array(current.flatten(), dtype=np.int32)
+        sums = np.array(line_sums(current.flatten()), dtype=np.int32)
+        value = current.value
+        window = 64
 
+        while it < self.max_iterations:
+            # Score few swaps while improvements are common, up to a full block once they are rare
+            a, b = swaps.peek(min(window, self.max_iterations - it))
+            deltas = batch_swap_delta(flat, sums, a, b)
+            improving = np.flatnonzero(deltas > 0)
+            if len(improving) > 0:
+                k = int(improving[0])
+                self.list_of_value.append_repeat(value, k)
+                apply_swap(flat, sums, a[k], b[k])
+                value += int(deltas[k])
+                self.list_of_value.append(value)
+                self.trajectory.append(flat.tolist(), value)
+                steps = k + 1
+                window = max(64, 4 * steps)
+            else:
+                steps = len(a)
+                self.list_of_value.append_repeat(value, steps)
+                window = min(2 * window, self.block_size)
+            swaps.consume(steps)
+            it += steps
+            if self.budget is not None and self.budget.update(value, steps, steps):
+                break
+
+        current = MagicCube.from_flat(flat.tolist())
+        self.trajectory.close()
+        if self.budget is not None and self.budget.exhausted():
+            print(f"Stopped by budget: {self.budget.stop_reason}")
         current.print_cube()
         self.duration = time.time() - start_time
-        self.iteration = i + 1
+        self.iteration = it
         print(self.duration)
         print(self.iteration)
-        self.makePlot()
+        record_run("stochastic", self.filepath, {"max_iterations": self.max_iterations,
+                                               "initializer": self.initializer}, self.seed,
+                   start_time, time.time(), self.list_of_value.first, current.value, self.iteration,
+                   current)
+        if plot:
+            self.makePlot()
 
-    def makePlot(self):
-        plt.figure(figsize=(12, 8))
+    def makePlot(self, output=None):
+        fig = new_figure((12, 8), output)
         
-        plt.subplot(2, 1, 1)
-        plt.plot(list(range(len(self.list_of_value))), self.list_of_value)
-        plt.title("Magic Cube Value over Iterations")
-        plt.xlabel("Iteration")
-        plt.ylabel("Value")
-        plt.grid(True)
+        ax = fig.add_subplot(2, 1, 1)
+        plot_series(ax, *self.list_of_value.series())
+        ax.set_title("Magic Cube Value over Iterations")
+        ax.set_xlabel("Iteration")
+        ax.set_ylabel("Value")
+        ax.grid(True)
         
-        plt.subplot(2, 1, 2)
-        plt.axis('off')
+        ax = fig.add_subplot(2, 1, 2)
+        ax.axis('off')
         info_text = (
-            f"Initial Value: {self.list_of_value[0]}\n"
-            f"Final Value: {self.list_of_value[-1]}\n"
+            f"Initial Value: {self.list_of_value.first}\n"
+            f"Final Value: {self.list_of_value.last}\n"
             f"Total Iterations: {self.iteration}\n"
             f"Duration: {self.duration:.2f} seconds"
         )
-        plt.text(0.1, 0.5, info_text, fontsize=12, verticalalignment='center')
-        
-        plt.tight_layout()
-        plt.show()
-
-    def make_file(self, name):
-        directory = ".\\save_file"
-        os.makedirs(directory, exist_ok=True)
-        
-        counter = 1
-        while True:
-            filename = f"{name}{counter}.txt"
-            filepath = os.path.join(directory, filename)
-            
-            if not os.path.exists(filepath):
-                break
-            counter += 1
+        ax.text(0.1, 0.5, info_text, fontsize=12, verticalalignment='center')
         
-        return filepath
+        finish_figure(fig, output)
 
 if __name__ == "__main__":
     SH = stochastic()
@@ -0,0 +1,277 @@
+import argparse
+import inspect
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from run_catalog import connect
+from solver import ISLAND_PARAMS, algorithm_name, load, parse_param
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweep_results (
+    key TEXT PRIMARY KEY,
+    algorithm TEXT NOT NULL,
+    params TEXT NOT NULL,
+    seed INTEGER,
+    budget TEXT NOT NULL,
+    final_value INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+# Constructor arguments that are not hyperparameters
+NOT_PARAMS = ("seed", "budget", "filepath", "checkpoint_interval", "checkpoint_path")
+
+
+def normalize(algorithm, params):
+    # Fills in constructor defaults, so {} and {"cooling_rate": 0.99995} are
+    # the same cache entry
+    algorithm = algorithm_name(algorithm)
+    signature = inspect.signature(load(algorithm))
+    full = {name: parameter.default for name, parameter in signature.parameters.items()
+            if name not in NOT_PARAMS and parameter.default is not inspect.Parameter.empty
+            and isinstance(parameter.default, (int, float, str, bool, type(None)))}
+    for key, value in params.items():
+        if key not in signature.parameters and key not in ISLAND_PARAMS:
+            raise ValueError(f"Unknown parameter for {algorithm}: {key}")
+        full[key] = value
+    return full
+
+
+def cache_key(algorithm, params, seed, budget):
+    return json.dumps([algorithm, params, seed, budget], sort_keys=True)
+
+
+def cache_connect(root=None):
+    connection = connect(root)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def cached_results(keys, root=None):
+    connection = cache_connect(root)
+    try:
+        rows = connection.execute(
+            f"SELECT key, result FROM sweep_results WHERE key IN ({', '.join('?' * len(keys))})",
+            list(keys)).fetchall() if keys else []
+    finally:
+        connection.close()
+    return {key: json.loads(result) for key, result in rows}
+
+
+def store_result(key, job, result, root=None):
+    connection = cache_connect(root)
+    try:
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sweep_results "
+                "(key, algorithm, params, seed, budget, final_value, result, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, job["algorithm"], json.dumps(job["params"], sort_keys=True), job["seed"],
+                 json.dumps(job["budget"], sort_keys=True), result["final_value"],
+                 json.dumps(result), time.time()))
+    finally:
+        connection.close()
+
+
+def evaluate(job):
+    # Runs in a pool process; only the fields a sweep ranks and reports on
+    # are sent back
+    from solver import solve
+    result = solve(job["algorithm"], job["params"], job["seed"], job["budget"],
+                   root=job["root"], quiet=True)
+    return {key: result.get(key) for key in
+            ("run_id", "final_value", "initial_value", "iterations", "wall_time", "stop_reason", "path")}
+
+
+def grid(space):
+    # Every combination of a {name: [values]} space
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def sample(space, n, rng=random):
+    # `n` random configs. A list is a set of choices, (low, high) a uniform
+    # range (integers if both ends are) and ("log", low, high) a log-uniform one
+    configs = []
+    for _ in range(n):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, list):
+                config[name] = rng.choice(values)
+            elif values[0] == "log":
+                config[name] = math.exp(rng.uniform(math.log(values[1]), math.log(values[2])))
+            elif all(isinstance(value, int) for value in values):
+                config[name] = rng.randint(*values)
+            else:
+                config[name] = rng.uniform(*values)
+        configs.append(config)
+    return configs
+
+
+def run_configs(algorithm, configs, seeds, budget, workers=None, root=None, refresh=False, report=None):
+    # Evaluates every config on every seed and returns one summary per config
+    # (mean/min/max final value, mean wall time, per-seed results), best
+    # first. Results already in the cache are reused unless `refresh`.
+    algorithm = algorithm_name(algorithm)
+    report = report or (lambda message: None)
+    budget = dict(budget)
+    jobs = {}
+    summaries = []
+    for config in configs:
+        params = normalize(algorithm, config)
+        summary = {"params": config, "results": {}}
+        summaries.append(summary)
+        for seed in seeds:
+            key = cache_key(algorithm, params, seed, budget)
+            jobs.setdefault(key, {"algorithm": algorithm, "params": params, "seed": seed,
+                                  "budget": budget, "root": root, "summaries": []})
+            jobs[key]["summaries"].append((summary, seed))
+
+    cached = {} if refresh else cached_results(list(jobs), root)
+    missing = [key for key in jobs if key not in cached]
+    report(f"{len(jobs)} runs: {len(jobs) - len(missing)} cached, {len(missing)} to compute")
+
+    results = dict(cached)
+    if missing:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {}
+            for key in missing:
+                job = {name: value for name, value in jobs[key].items() if name != "summaries"}
+                futures[pool.submit(evaluate, job)] = key
+            for done, future in enumerate(as_completed(futures), 1):
+                key = futures[future]
+                job = jobs[key]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    report(f"[{done}/{len(missing)}] {job['params']} seed {job['seed']} failed: {e}")
+                    continue
+                store_result(key, job, result, root)
+                results[key] = result
+                report(f"[{done}/{len(missing)}] seed {job['seed']}: {result['final_value']}")
+
+    for key, job in jobs.items():
+        if key in results:
+            for summary, seed in job["summaries"]:
+                summary["results"][seed] = results[key]
+    for summary in summaries:
+        values = [result["final_value"] for result in summary["results"].values()]
+        times = [result["wall_time"] for result in summary["results"].values()]
+        summary["mean"] = sum(values) / len(values) if values else None
+        summary["min"] = min(values, default=None)
+        summary["max"] = max(values, default=None)
+        summary["wall_time"] = sum(times) / len(times) if times else None
+    summaries.sort(key=lambda summary: -math.inf if summary["mean"] is None else summary["mean"],
+                   reverse=True)
+    return summaries
+
+
+def successive_halving(algorithm, configs, seeds, budget, eta=3, rounds=None, resource="max_evaluations",
+                       workers=None, root=None, refresh=False, report=None):
+    # Runs every config with `budget`, keeps the best 1/eta, multiplies the
+    # `resource` limit by eta and repeats until one config is left (or for
+    # `rounds` rounds). Returns the last round's summaries.
+    if resource not in budget:
+        raise ValueError(f"Successive halving scales {resource}, but the budget has no {resource}")
+    report = report or (lambda message: None)
+    if rounds is None:
+        rounds = max(1, math.ceil(math.log(len(configs), eta)) + 1) if len(configs) > 1 else 1
+    budget = dict(budget)
+    for round_number in range(rounds):
+        report(f"Round {round_number + 1}: {len(configs)} config(s) with {resource}={budget[resource]}")
+        summaries = run_configs(algorithm, configs, seeds, budget, workers, root, refresh, report)
+        keep = max(1, math.ceil(len(summaries) / eta))
+        if round_number == rounds - 1 or len(summaries) == 1:
+            break
+        configs = [summary["params"] for summary in summaries[:keep]]
+        budget[resource] = type(budget[resource])(budget[resource] * eta)
+    return summaries
+
+
+def parse_values(text):
+    # "key=a,b,c" -> (key, [a, b, c]) with JSON-parsed values
+    key, _, values = text.partition("=")
+    return key, [parse_param("_=" + value)[1] for value in values.split(",")]
+
+
+def parse_range(text, log=False):
+    # "key=low:high" -> (key, (low, high)) or (key, ("log", low, high))
+    key, _, values = text.partition("=")
+    low, high = (parse_param("_=" + value)[1] for value in values.split(":"))
+    return key, ("log", low, high) if log else (low, high)
+
+
+def print_summaries(summaries, limit=20):
+    print(f"{'Mean':>7} {'Min':>5} {'Max':>5} {'Time (s)':>9}  Params")
+    for summary in summaries[:limit]:
+        if summary["mean"] is None:
+            print(f"{'-':>7} {'-':>5} {'-':>5} {'-':>9}  {json.dumps(summary['params'])}")
+            continue
+        print(f"{summary['mean']:>7.2f} {summary['min']:>5} {summary['max']:>5} "
+              f"{summary['wall_time']:>9.2f}  {json.dumps(summary['params'])}")
+    if len(summaries) > limit:
+        print(f"... ({len(summaries) - limit} more)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweeps with cached results")
+    parser.add_argument("--algo", required=True)
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2,...",
+                        help="values to try for one parameter (repeatable)")
+    parser.add_argument("--range", action="append", default=[], metavar="KEY=LOW:HIGH",
+                        help="uniform range for --random (repeatable)")
+    parser.add_argument("--log-range", action="append", default=[], metavar="KEY=LOW:HIGH",
+                        help="log-uniform range for --random (repeatable)")
+    parser.add_argument("--random", type=int, metavar="N", help="sample N configs instead of the full grid")
+    parser.add_argument("--halving", action="store_true", help="successive halving over the configs")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--rounds", type=int)
+    parser.add_argument("--seeds", type=int, default=3, help="seeds 0..N-1 for every config")
+    parser.add_argument("--max-evaluations", type=int)
+    parser.add_argument("--time-limit", type=float)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--root", help="output directory for runs and the cache")
+    parser.add_argument("--refresh", action="store_true", help="recompute cached results")
+    parser.add_argument("--json", action="store_true", help="print the summaries as JSON")
+    args = parser.parse_args()
+
+    space = dict(parse_values(text) for text in args.grid)
+    space.update(parse_range(text) for text in args.range)
+    space.update(parse_range(text, log=True) for text in args.log_range)
+    budget = {"max_evaluations": args.max_evaluations, "time_limit": args.time_limit}
+    budget = {key: value for key, value in budget.items() if value is not None}
+    if not budget:
+        parser.error("give --max-evaluations and/or --time-limit")
+    if args.random:
+        configs = sample(space, args.random)
+    elif any(not isinstance(values, list) for values in space.values()):
+        parser.error("--range and --log-range need --random")
+    else:
+        configs = grid(space)
+    seeds = list(range(args.seeds))
+    report = lambda message: print(message, file=sys.stderr)
+
+    try:
+        if args.halving:
+            resource = "max_evaluations" if "max_evaluations" in budget else "time_limit"
+            summaries = successive_halving(args.algo, configs, seeds, budget, args.eta, args.rounds, resource,
+                                           args.workers, args.root, args.refresh, report)
+        else:
+            summaries = run_configs(args.algo, configs, seeds, budget, args.workers, args.root,
+                                    args.refresh, report)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        print_summaries(summaries)
+
+
+if __name__ == "__main__":
+    main()
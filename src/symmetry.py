@@ -0,0 +1,72 @@
+from collections import Counter
+from itertools import permutations, product
+from operator import itemgetter
+from delta import CELLS, LINES, SIZE, cell
+
+COMPLEMENT_TOTAL = CELLS + 1
+
+
+def axis_table(order, flips):
+    # TABLE[c] is where cell c lands after permuting the axes by `order` and
+    # reflecting the axes marked in `flips`
+    table = []
+    for i in range(SIZE):
+        for j in range(SIZE):
+            for k in range(SIZE):
+                source = (i, j, k)
+                target = [source[axis] for axis in order]
+                target = [SIZE - 1 - x if flip else x for x, flip in zip(target, flips)]
+                table.append(cell(*target))
+    return tuple(table)
+
+
+def preserves_objective(table):
+    lines = Counter(frozenset(line) for line in LINES)
+    return Counter(frozenset(table[c] for c in line) for line in LINES) == lines
+
+
+# All 48 rotations/reflections of the cube
+AXIS_TABLES = tuple(axis_table(order, flips)
+                    for order in permutations(range(3))
+                    for flips in product((False, True), repeat=3))
+
+# The ones that map MagicCube.calculate_value's lines onto themselves. A real
+# magic cube objective keeps all 48; calculate_value counts some plane
+# diagonals twice and skips others, which leaves only the 8 axis reflections.
+SYMMETRIES = tuple(table for table in AXIS_TABLES if preserves_objective(table))
+
+
+def gather(table):
+    # itemgetter over the inverse table: gather(table)(flat)[table[c]] == flat[c]
+    inverse = [0] * CELLS
+    for c, target in enumerate(table):
+        inverse[target] = c
+    return itemgetter(*inverse)
+
+
+GATHERS = tuple(gather(table) for table in SYMMETRIES)
+
+
+def apply(flat, table, complement=False):
+    image = gather(table)(flat)
+    if complement:
+        return tuple(COMPLEMENT_TOTAL - value for value in image)
+    return image
+
+
+def images(flat):
+    # Every state with the same objective value under the symmetries above and
+    # the complement map v -> 126 - v
+    for getter in GATHERS:
+        image = getter(flat)
+        yield image
+        yield tuple(COMPLEMENT_TOTAL - value for value in image)
+
+
+def canonical_form(flat):
+    # Lexicographically smallest image, as a hashable tuple
+    return min(images(flat))
+
+
+def equivalent(first, second):
+    return canonical_form(first) == canonical_form(second)
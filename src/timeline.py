@@ -0,0 +1,70 @@
+import numpy as np
+from trajectory import TrajectoryReader
+
+
+class Timeline:
+    # `low`/`high` are the min/max value of each bucket of `bucket_size`
+    # states; `events` is a list of (index, kind, label) sorted by index
+    def __init__(self, length, bucket_size, low, high, events):
+        self.length = length
+        self.bucket_size = bucket_size
+        self.low = low
+        self.high = high
+        self.events = events
+        self.event_indices = [event[0] for event in events]
+
+
+def load_values(states):
+    # One streaming pass over the file: a byte per state, never the cells
+    if isinstance(states, TrajectoryReader):
+        return np.frombuffer(b"".join(states.iter_values()), dtype=np.uint8).astype(np.int16)
+    return np.array([cube.value for cube in states], dtype=np.int16)
+
+
+def event_label(kind, data):
+    if kind == "reheat":
+        return f"Reheat (T={data.get('temperature', 0):.3g})"
+    if kind == "restart":
+        return f"Restart {data.get('restart', '')}".rstrip()
+    if kind == "restart_end":
+        return f"Restart {data.get('restart', '')} end: {data.get('start_value')} -> {data.get('final_value')}"
+    if kind == "sideways":
+        return f"Sideways moves at {data.get('value', '')}".rstrip()
+    return kind.capitalize()
+
+
+def value_events(values, min_plateau):
+    events = []
+    if len(values) == 0:
+        return events
+
+    # New best values
+    best = np.maximum.accumulate(values)
+    for index in np.flatnonzero(best[1:] > best[:-1]) + 1:
+        events.append((int(index), "improvement", f"Value {values[index]}"))
+
+    # Runs of at least `min_plateau` equal values
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(values)])))
+    for start, length in zip(starts, lengths):
+        if length >= min_plateau:
+            events.append((int(start), "plateau", f"Plateau at {values[start]} ({length} states)"))
+    return events
+
+
+def build_timeline(states, buckets=560, min_plateau=50):
+    values = load_values(states)
+    length = len(values)
+    bucket_size = max(1, -(-length // buckets))
+    starts = np.arange(0, length, bucket_size)
+    if length:
+        low = np.minimum.reduceat(values, starts)
+        high = np.maximum.reduceat(values, starts)
+    else:
+        low = high = values
+
+    events = value_events(values, min_plateau)
+    for index, kind, data in getattr(states, "events", []):
+        events.append((max(0, min(index, length - 1)), kind, event_label(kind, data)))
+    events.sort(key=lambda event: event[0])
+    return Timeline(length, bucket_size, low, high, events)
@@ -0,0 +1,376 @@
+import bisect
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from MagicCube import MagicCube
+from run_storage import make_file
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# File layout:
+#   MAGIC
+#   frame*            frame = FRAME_HEADER + compressed payload
+#   index frame       (only present when the writer was closed cleanly)
+#   TRAILER           (offset of the index frame + END_MAGIC)
+#
+# A state frame holds `count` states: `count` value bytes followed by
+# `count * 125` cell bytes, compressed as one independent chunk, so a reader
+# only has to decompress the chunk containing the state it wants.
+#
+# A marker frame holds `count` events as a JSON list of [index, kind, data]:
+# something that happened before state `index` was recorded (a reheat, a
+# restart, ...). The index frame repeats every event after its chunk entries
+# so readers of a cleanly closed file never walk the frames.
+MAGIC = b"MCTRAJ1\n"
+END_MAGIC = b"MCTRJEND"
+FRAME_HEADER = struct.Struct("<cBIIdd")
+INDEX_ENTRY = struct.Struct("<QQIddBB")
+TRAILER = struct.Struct("<Q8s")
+
+STATE_FRAME = b"S"
+INDEX_FRAME = b"I"
+MARKER_FRAME = b"M"
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+CELLS = 125
+
+
+def compress(codec, data, level):
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, level)
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return data
+
+
+def decompress(codec, data):
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Trajectory is zstd-compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def default_codec():
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+class Chunk:
+    def __init__(self, offset, first, count, t_first, t_last, min_value, max_value):
+        self.offset = offset
+        self.first = first
+        self.count = count
+        self.t_first = t_first
+        self.t_last = t_last
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def pack(self):
+        return INDEX_ENTRY.pack(self.offset, self.first, self.count,
+                                self.t_first, self.t_last,
+                                self.min_value, self.max_value)
+
+
+def read_index(file):
+    # Returns (chunks, end_of_frames, events). Uses the footer index when
+    # present and falls back to walking the frame headers (e.g. after a crash).
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a trajectory file")
+
+    if size >= len(MAGIC) + TRAILER.size:
+        file.seek(size - TRAILER.size)
+        index_offset, end_magic = TRAILER.unpack(file.read(TRAILER.size))
+        if end_magic == END_MAGIC:
+            file.seek(index_offset)
+            kind, codec, count, length, _, _ = FRAME_HEADER.unpack(file.read(FRAME_HEADER.size))
+            if kind == INDEX_FRAME:
+                payload = decompress(codec, file.read(length))
+                chunks = [Chunk(*INDEX_ENTRY.unpack_from(payload, n * INDEX_ENTRY.size))
+                          for n in range(count)]
+                events = payload[count * INDEX_ENTRY.size:]
+                return chunks, index_offset, json.loads(events) if events else []
+
+    chunks = []
+    events = []
+    first = 0
+    offset = len(MAGIC)
+    file.seek(offset)
+    while offset + FRAME_HEADER.size <= size:
+        header = file.read(FRAME_HEADER.size)
+        kind, codec, count, length, t_first, t_last = FRAME_HEADER.unpack(header)
+        if kind not in (STATE_FRAME, MARKER_FRAME) or offset + FRAME_HEADER.size + length > size:
+            break
+        payload = decompress(codec, file.read(length))
+        if kind == MARKER_FRAME:
+            events.extend(json.loads(payload))
+        else:
+            values = payload[:count]
+            chunks.append(Chunk(offset, first, count, t_first, t_last, min(values), max(values)))
+            first += count
+        offset += FRAME_HEADER.size + length
+    return chunks, offset, events
+
+
+class TrajectoryWriter:
+    def __init__(self, filepath=None, chunk_size=1024, codec=None, level=6, length=None, name=None):
+        # Without a filepath a new save file is reserved under `name` here,
+        # as the header is written, so runners that are never run leave no file
+        if filepath is None:
+            filepath = make_file(name)
+        self.filepath = filepath
+        self.chunk_size = chunk_size
+        self.codec = default_codec() if codec is None else codec
+        self.level = level
+        self.values = bytearray()
+        self.cells = bytearray()
+        self.t_first = None
+        self.t_last = None
+        self.pending_events = []
+
+        if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+            # Reopen for appending: drop the footer, keep every complete frame
+            self.file = open(filepath, "r+b")
+            self.chunks, end, self.events = read_index(self.file)
+            if length is not None:
+                # Roll back to a known state count, e.g. the one stored in a checkpoint
+                kept = [chunk for chunk in self.chunks if chunk.first < length]
+                if sum(chunk.count for chunk in kept) != length:
+                    raise ValueError(f"Trajectory has no chunk boundary at state {length}")
+                if len(kept) < len(self.chunks):
+                    end = self.chunks[len(kept)].offset
+                self.chunks = kept
+                self.events = [event for event in self.events if event[0] <= length]
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            self.file = open(filepath, "wb")
+            self.file.write(MAGIC)
+            self.chunks = []
+            self.events = []
+        self.count = sum(chunk.count for chunk in self.chunks)
+
+    def __len__(self):
+        return self.count + len(self.values)
+
+    def append(self, state, value=None):
+        if isinstance(state, MagicCube):
+            value = state.value if value is None else value
+            state = state.flatten()
+        elif value is None:
+            value = MagicCube.from_flat(state).value
+
+        now = time.time()
+        if self.t_first is None:
+            self.t_first = now
+        self.t_last = now
+        self.values.append(value)
+        self.cells.extend(state)
+        if len(self.values) >= self.chunk_size:
+            self.flush()
+
+    def mark(self, kind, **data):
+        # Records an event just before the next appended state
+        event = [len(self), kind, data]
+        self.events.append(event)
+        self.pending_events.append(event)
+
+    def flush(self):
+        if self.values:
+            self.write_states()
+        if self.pending_events:
+            payload = zlib.compress(json.dumps(self.pending_events).encode())
+            self.file.write(FRAME_HEADER.pack(MARKER_FRAME, CODEC_ZLIB, len(self.pending_events),
+                                              len(payload), 0.0, 0.0))
+            self.file.write(payload)
+            self.file.flush()
+            self.pending_events = []
+
+    def write_states(self):
+        payload = compress(self.codec, bytes(self.values) + bytes(self.cells), self.level)
+        chunk = Chunk(self.file.tell(), self.count, len(self.values),
+                      self.t_first, self.t_last, min(self.values), max(self.values))
+        self.file.write(FRAME_HEADER.pack(STATE_FRAME, self.codec, chunk.count,
+                                          len(payload), chunk.t_first, chunk.t_last))
+        self.file.write(payload)
+        self.file.flush()
+        self.chunks.append(chunk)
+        self.count += chunk.count
+        self.values = bytearray()
+        self.cells = bytearray()
+        self.t_first = None
+        self.t_last = None
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        index_offset = self.file.tell()
+        events = json.dumps(self.events).encode() if self.events else b""
+        payload = zlib.compress(b"".join(chunk.pack() for chunk in self.chunks) + events)
+        self.file.write(FRAME_HEADER.pack(INDEX_FRAME, CODEC_ZLIB, len(self.chunks),
+                                          len(payload), 0.0, 0.0))
+        self.file.write(payload)
+        self.file.write(TRAILER.pack(index_offset, END_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader:
+    def __init__(self, filepath, cache_chunks=4):
+        self.filepath = filepath
+        self.cache_chunks = cache_chunks
+        self.cache = OrderedDict()
+        self.file = open(filepath, "rb")
+        self.chunks, _, self.events = read_index(self.file)
+        self.starts = [chunk.first for chunk in self.chunks]
+        self.times = [chunk.t_first for chunk in self.chunks]
+        self.length = sum(chunk.count for chunk in self.chunks)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        return MagicCube.from_flat(self.cells(index))
+
+    def __iter__(self):
+        for index in range(self.length):
+            yield self[index]
+
+    def chunk_of(self, index):
+        if not 0 <= index < self.length:
+            raise IndexError("Trajectory index out of range")
+        lo, hi = 0, len(self.starts) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.starts[mid] <= index:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def load_chunk(self, n):
+        if n in self.cache:
+            self.cache.move_to_end(n)
+            return self.cache[n]
+        chunk = self.chunks[n]
+        self.file.seek(chunk.offset)
+        _, codec, count, length, _, _ = FRAME_HEADER.unpack(self.file.read(FRAME_HEADER.size))
+        payload = decompress(codec, self.file.read(length))
+        self.cache[n] = payload
+        if len(self.cache) > self.cache_chunks:
+            self.cache.popitem(last=False)
+        return payload
+
+    def cells(self, index):
+        n = self.chunk_of(index)
+        chunk = self.chunks[n]
+        payload = self.load_chunk(n)
+        start = chunk.count + (index - chunk.first) * CELLS
+        return payload[start:start + CELLS]
+
+    def value(self, index):
+        n = self.chunk_of(index)
+        return self.load_chunk(n)[index - self.chunks[n].first]
+
+    def start_time(self):
+        return self.chunks[0].t_first if self.chunks else 0.0
+
+    def duration(self):
+        return self.chunks[-1].t_last - self.chunks[0].t_first if self.chunks else 0.0
+
+    def time_of(self, index):
+        # Wall-clock time of a state, interpolated inside its chunk
+        chunk = self.chunks[self.chunk_of(index)]
+        if chunk.count == 1:
+            return chunk.t_first
+        return chunk.t_first + (index - chunk.first) / (chunk.count - 1) * (chunk.t_last - chunk.t_first)
+
+    def index_at_time(self, t):
+        # Last state recorded at or before `t` (the first state if none was)
+        n = bisect.bisect_right(self.times, t) - 1
+        if n < 0:
+            return 0
+        chunk = self.chunks[n]
+        if t >= chunk.t_last or chunk.t_last == chunk.t_first:
+            return chunk.first + chunk.count - 1
+        return chunk.first + int((t - chunk.t_first) / (chunk.t_last - chunk.t_first) * (chunk.count - 1))
+
+    def best(self):
+        # Index of the first state with the highest value. The chunk index
+        # keeps each chunk's maximum, so only that chunk is decompressed.
+        if not self.chunks:
+            return None
+        top = max(chunk.max_value for chunk in self.chunks)
+        n = next(n for n, chunk in enumerate(self.chunks) if chunk.max_value == top)
+        return self.chunks[n].first + self.load_chunk(n).index(top)
+
+    def segments(self, kind):
+        # (start, stop, data) for the states from each `kind` marker up to the
+        # next one, e.g. segments("restart") splits a random-restart run by climb
+        marks = [(index, data) for index, event_kind, data in self.events if event_kind == kind]
+        stops = [index for index, _ in marks[1:]] + [self.length]
+        return [(index, stop, data) for (index, data), stop in zip(marks, stops)]
+
+    def iter_values(self):
+        # Every state's value, one chunk at a time, without touching the cache
+        for chunk in self.chunks:
+            self.file.seek(chunk.offset)
+            _, codec, count, length, _, _ = FRAME_HEADER.unpack(self.file.read(FRAME_HEADER.size))
+            yield decompress(codec, self.file.read(length))[:count]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_text_states(filepath):
+    with open(filepath, "r") as file:
+        for state in file.read().strip().split(";"):
+            if state.strip():
+                numbers = [int(num) for num in state.split()]
+                yield numbers
+
+
+def compress_text_file(filepath, output=None, chunk_size=1024):
+    if output is None:
+        output = os.path.splitext(filepath)[0] + ".traj"
+    with TrajectoryWriter(output, chunk_size=chunk_size) as writer:
+        for numbers in read_text_states(filepath):
+            writer.append(numbers)
+    return output
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python trajectory.py <file.txt> [<file.txt> ...]")
+        sys.exit(1)
+    for path in sys.argv[1:]:
+        output = compress_text_file(path)
+        print(f"{path} ({os.path.getsize(path)} bytes) -> {output} ({os.path.getsize(output)} bytes)")
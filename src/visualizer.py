@@ -1,22 +1,71 @@
 import flet as ft
-import time
+import flet.canvas as cv
+import bisect
+import queue
 import threading
 import os
 from MagicCube import MagicCube
+from playback import PlaybackScheduler
+from trajectory import TrajectoryReader
+from run_storage import resolve
+from timeline import build_timeline
+from comparison import Comparison, SYNC_MODES
+
+TIMELINE_WIDTH = 560
+TIMELINE_HEIGHT = 60
+MAX_EVENT_OPTIONS = 500
+EVENT_COLORS = {
+    "improvement": ft.colors.GREEN,
+    "reheat": ft.colors.RED,
+    "restart": ft.colors.BLUE,
+    "sideways": ft.colors.ORANGE,
+    "plateau": ft.colors.GREY,
+}
+LAYER_COLORS = [ft.colors.GREEN_50, ft.colors.ORANGE_50, ft.colors.RED_50,
+                ft.colors.PURPLE_50, ft.colors.YELLOW_50]
+RUN_COLORS = [ft.colors.BLUE, ft.colors.RED, ft.colors.GREEN, ft.colors.PURPLE,
+              ft.colors.ORANGE, ft.colors.TEAL, ft.colors.BROWN, ft.colors.PINK]
 
 class Visualizer:
-    def __init__(self):
+    allow_multiple = False
+    extensions = ["txt", "traj"]
+
+    def __init__(self, fps=30):
         self.list_of_magiccube = []
         self.current_index = 0
         self.is_playing = False
         self.is_reverse = False
+        # Playback speed in states per second; the speed slider is log10 of it
         self.speed = 1.0
+        self.scheduler = PlaybackScheduler(fps, self.speed)
+        # One player thread owns playback state; `lock` serializes it with
+        # file loading and rendering
+        self.commands = queue.Queue()
+        self.player = None
+        self.lock = threading.RLock()
+        self.dirty = False
+        self.timeline = None
         self.page = None
+        # One Text per cell in flatten() order, and the values they show
+        self.cells = []
+        self.shown = []
         
     def load_file(self, filename):
+        # Holds the lock so the player never renders from a half-replaced file
+        with self.lock:
+            return self.read_file(filename)
+
+    def read_file(self, filename):
         try:
-            directory = ".\\save_file"
-            filepath = os.path.join(directory, filename)
+            filepath = resolve(filename)
+            filename = os.path.basename(filepath)
+
+            if isinstance(self.list_of_magiccube, TrajectoryReader):
+                self.list_of_magiccube.close()
+
+            if filename.endswith(".traj"):
+                self.list_of_magiccube = TrajectoryReader(filepath)
+                return self.on_file_loaded(filename)
 
             with open(filepath, 'r') as file:
                 content = file.read()
@@ -38,21 +87,7 @@ class Visualizer:
                         
                         self.list_of_magiccube.append(MagicCube(cube.cube))
                 
-                self.current_index = 0
-                self.is_playing = False
-                self.is_reverse = False
-                
-                if self.page:
-                    self.update_visualization(self.list_of_magiccube[0])
-                    self.file_path_text.value = f"Loaded: {filename}"
-                    self.file_path_text.update()
-
-                    self.progress_slider.max = len(self.list_of_magiccube) - 1
-                    self.progress_slider.value = 0
-                    self.progress_slider.disabled = False
-                    self.progress_slider.update()
-                
-                return True
+                return self.on_file_loaded(filename)
                         
         except FileNotFoundError:
             if self.page:
@@ -63,6 +98,70 @@ class Visualizer:
                 self.show_error_dialog(f"Error occurred: {str(e)}")
             return False
 
+    def on_file_loaded(self, filename):
+        self.current_index = 0
+        self.is_playing = False
+        self.is_reverse = False
+        
+        if self.page:
+            self.file_path_text.value = f"Loaded: {filename}"
+            self.progress_slider.max = len(self.list_of_magiccube) - 1
+            self.progress_slider.disabled = False
+            self.timeline = self.make_timeline()
+            self.draw_timeline()
+            self.render(self.file_path_text, self.timeline_canvas, self.event_dropdown,
+                        self.prev_event_button, self.next_event_button)
+        
+        return True
+
+    def make_timeline(self):
+        return build_timeline(self.list_of_magiccube, TIMELINE_WIDTH)
+
+    def timeline_x(self, index):
+        return index / max(1, len(self.list_of_magiccube) - 1) * TIMELINE_WIDTH
+
+    def draw_timeline(self):
+        # Value shapes, event ticks along the top and a cursor line that
+        # render() moves
+        timeline = self.timeline
+        shapes = self.timeline_shapes()
+        for index, kind, _ in timeline.events[:MAX_EVENT_OPTIONS]:
+            x = self.timeline_x(index)
+            color = EVENT_COLORS.get(kind, ft.colors.BLACK)
+            shapes.append(cv.Line(x, 0, x, 8, paint=ft.Paint(color=color, stroke_width=2)))
+        shapes.append(self.timeline_cursor)
+        self.timeline_canvas.shapes = shapes
+
+        self.event_dropdown.options = [
+            ft.dropdown.Option(key=str(n), text=f"{index + 1}: {label}")
+            for n, (index, _, label) in enumerate(timeline.events[:MAX_EVENT_OPTIONS])
+        ]
+        self.event_dropdown.value = None
+        self.event_dropdown.disabled = not timeline.events
+        self.prev_event_button.disabled = not timeline.events
+        self.next_event_button.disabled = not timeline.events
+
+    def timeline_shapes(self):
+        # Min/max value per bucket as vertical bars
+        timeline = self.timeline
+        scale = TIMELINE_HEIGHT / 109
+        shapes = []
+        paint = ft.Paint(color=ft.colors.BLUE_GREY_400, stroke_width=1)
+        for bucket, (low, high) in enumerate(zip(timeline.low, timeline.high)):
+            x = self.timeline_x(bucket * timeline.bucket_size)
+            top = TIMELINE_HEIGHT - high * scale
+            bottom = max(TIMELINE_HEIGHT - low * scale, top + 1)
+            shapes.append(cv.Line(x, top, x, bottom, paint=paint))
+        return shapes
+
+    def timeline_clicked(self, e):
+        if len(self.list_of_magiccube) > 0:
+            self.send("seek", round(e.local_x / TIMELINE_WIDTH * (len(self.list_of_magiccube) - 1)))
+
+    def event_selected(self, e):
+        if e.control.value is not None:
+            self.send("seek", self.timeline.events[int(e.control.value)][0])
+
     def show_error_dialog(self, message):
         def close_dialog(e):
             dialog.open = False
@@ -83,8 +182,10 @@ class Visualizer:
 
     def pick_files_result(self, e: ft.FilePickerResultEvent):
         if e.files:
-            file_path = e.files[0].path
-            filename = os.path.basename(file_path)
+            self.open(e.files[0].path)
+
+    def open(self, filename):
+        with self.lock:
             success = self.load_file(filename)
             
             if success:
@@ -95,20 +196,20 @@ class Visualizer:
                 self.next_button.disabled = self.current_index >= len(self.list_of_magiccube) - 1
                 self.progress_slider.disabled = False
                 
-                self.play_button.update()
-                self.playback_button.update()
-                self.reset_button.update()
-                self.prev_button.update()
-                self.next_button.update()
-                self.progress_slider.update()
+                self.page.update(self.play_button, self.playback_button, self.reset_button,
+                                 self.prev_button, self.next_button, self.progress_slider)
     
     def progress_changed(self, e):
-        self.current_index = int(e.control.value)
-        self.update_visualization(self.list_of_magiccube[self.current_index])
+        self.send("seek", e.control.value)
 
-    def create_face(self, numbers, offset_x, offset_y, color, cube_size=200):
+    def create_face(self, offset_x, offset_y, color, cube_size=200):
         cell_size = cube_size / 5 
         spacing = 2
+        texts = [
+            [ft.Text("", size=cube_size * 0.08, weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER)
+             for j in range(5)]
+            for i in range(5)
+        ]
         
         face = ft.Container(
             width=cube_size,
@@ -127,12 +228,7 @@ class Visualizer:
                                 width=cell_size - spacing,
                                 height=cell_size - spacing,
                                 border=ft.border.all(1, ft.colors.BLACK),
-                                content=ft.Text(
-                                    str(numbers[i][j]),
-                                    size=16,
-                                    weight=ft.FontWeight.BOLD,
-                                    text_align=ft.TextAlign.CENTER
-                                ),
+                                content=texts[i][j],
                                 alignment=ft.alignment.center,
                                 bgcolor=ft.colors.WHITE10,
                             ) for j in range(5)
@@ -141,118 +237,166 @@ class Visualizer:
                 ]
             ),
         )
-        return face
+        return face, texts
 
-    def update_visualization(self, magic_cube):
-        if not self.page:
-            return
-            
-        # Layer state
-        layers = [
-            [[magic_cube.cube[k][i][j] for j in range(5)] for i in range(5)]
-            for k in range(5)
-        ]
-        
-        # position
+    def build_layer(self):
+        # The 125 cell controls are created once; frames only change their text
         cube_size = 200
         mid_x = cube_size
         
-        # Create faces with different colors
-        colors = [ft.colors.GREEN_50, ft.colors.ORANGE_50, ft.colors.RED_50, 
-                 ft.colors.PURPLE_50, ft.colors.YELLOW_50]
-        
-        faces = [
-            self.create_face(layers[i], mid_x * i, 0, colors[i])
-            for i in range(5)
-        ]
-
-        # Update layer
+        faces = []
+        self.cells = []
+        for i in range(5):
+            face, texts = self.create_face(mid_x * i, 0, LAYER_COLORS[i])
+            faces.append(face)
+            self.cells.extend(text for row in texts for text in row)
+        self.shown = [None] * len(self.cells)
         self.layer.controls = faces
+
+    def update_visualization(self, magic_cube, *controls):
+        # Updates only the cells whose value changed since the last frame and
+        # sends them, the info texts and any extra `controls` in one update
+        if not self.page:
+            return
+            
+        changed = self.show_cells(magic_cube.flatten())
         
         # Update iteration information
         self.iteration_information.value = f"Iteration: {self.current_index + 1}/{len(self.list_of_magiccube)}"
-        self.iteration_information.update()
         
         # Update value information
         self.value_information.value = f"Value: {magic_cube.value}"
-        self.value_information.update()
 
         # Update nav button
         self.prev_button.disabled = self.current_index <= 0
         self.next_button.disabled = self.current_index >= len(self.list_of_magiccube) - 1
-        self.prev_button.update()
-        self.next_button.update()
-        
-        self.layer.update()
-
-    def play_sequence(self):
-        while self.is_playing:
-            time.sleep(self.speed)
-            if self.is_reverse:
-                if self.current_index > 0:
-                    self.current_index -= 1
-                    self.progress_slider.value = self.current_index
-                    self.progress_slider.update()
-                    self.update_visualization(self.list_of_magiccube[self.current_index])
-                else:
-                    self.is_playing = False
-                    self.play_button.text = "Play Forward"
-                    self.play_button.update()
+        
+        self.page.update(*changed, self.iteration_information, self.value_information,
+                         self.prev_button, self.next_button, *controls)
+
+    def show_cells(self, values):
+        # Sets the cells whose value changed and returns them
+        changed = []
+        for c, value in enumerate(values):
+            if value != self.shown[c]:
+                self.shown[c] = value
+                self.cells[c].value = str(value)
+                changed.append(self.cells[c])
+        return changed
+
+    def send(self, *command):
+        # Button and slider handlers only queue commands; the player thread
+        # applies them in order and does all playback rendering
+        if self.player is None:
+            self.player = threading.Thread(target=self.player_loop, daemon=True)
+            self.player.start()
+        self.commands.put(command)
+
+    def player_loop(self):
+        while True:
+            if self.is_playing:
+                # A command arriving mid-wait is applied right away
+                self.scheduler.wait(self.current_index, sleep=self.wait_for_command)
             else:
-                if self.current_index < len(self.list_of_magiccube) - 1:
-                    self.current_index += 1
-                    self.progress_slider.value = self.current_index
-                    self.progress_slider.update()
-                    self.update_visualization(self.list_of_magiccube[self.current_index])
-                else:
+                self.apply(self.commands.get())
+            self.apply_pending()
+            with self.lock:
+                if self.is_playing:
+                    index = self.scheduler.index()
+                    if index != self.current_index:
+                        self.current_index = index
+                        self.dirty = True
+                    if self.scheduler.finished(self.current_index):
+                        self.is_playing = False
+                        self.dirty = True
+                if self.dirty:
+                    self.render()
+
+    def wait_for_command(self, delay):
+        try:
+            self.apply(self.commands.get(timeout=delay))
+        except queue.Empty:
+            pass
+
+    def apply_pending(self):
+        # Drains the queue so a burst of slider seeks is drawn once
+        while True:
+            try:
+                self.apply(self.commands.get_nowait())
+            except queue.Empty:
+                return
+
+    def apply(self, command):
+        with self.lock:
+            kind = command[0]
+            last = len(self.list_of_magiccube) - 1
+            if last < 0:
+                return
+            if kind == "toggle":
+                direction = command[1]
+                if self.is_playing and self.scheduler.direction == direction:
                     self.is_playing = False
-                    self.play_button.text = "Play Forward"
-                    self.play_button.update()
+                else:
+                    self.is_playing = True
+                    self.is_reverse = direction < 0
+                    self.scheduler.start(self.current_index, last + 1, direction)
+            elif kind == "seek":
+                self.current_index = min(max(int(command[1]), 0), last)
+            elif kind == "step":
+                self.current_index = min(max(self.current_index + command[1], 0), last)
+            elif kind == "reset":
+                self.is_playing = False
+                self.is_reverse = False
+                self.current_index = 0
+            elif kind == "speed":
+                self.speed = command[1]
+                self.scheduler.set_speed(self.speed)
+            elif kind == "event" and self.timeline is not None:
+                # Jump to the next/previous event from the current state
+                indices = self.timeline.event_indices
+                if command[1] > 0:
+                    n = bisect.bisect_right(indices, self.current_index)
+                else:
+                    n = bisect.bisect_left(indices, self.current_index) - 1
+                if 0 <= n < len(indices):
+                    self.current_index = indices[n]
+            if kind in ("seek", "step", "event") and self.is_playing:
+                self.scheduler.start(self.current_index, last + 1, self.scheduler.direction)
+            self.dirty = True
+
+    def render(self, *controls):
+        self.dirty = False
+        self.play_button.text = "Pause" if self.is_playing and not self.is_reverse else "Play Forward"
+        self.playback_button.text = "Pause" if self.is_playing and self.is_reverse else "Play Backward"
+        self.progress_slider.value = self.current_index
+        self.speed_information.value = self.speed_label()
+        self.timeline_cursor.x1 = self.timeline_cursor.x2 = self.timeline_x(self.current_index)
+        self.update_visualization(self.list_of_magiccube[self.current_index],
+                                  self.play_button, self.playback_button, self.progress_slider,
+                                  self.speed_information, self.timeline_cursor, *controls)
 
     def play_button_clicked(self, e):
-        self.is_playing = not self.is_playing
-        self.is_reverse = False
-        e.control.text = "Pause" if self.is_playing else "Play Forward"
-        e.control.update()
-        
-        if self.is_playing:
-            threading.Thread(target=self.play_sequence, daemon=True).start()
+        self.send("toggle", 1)
 
     def playback_button_clicked(self, e):
-        self.is_playing = not self.is_playing
-        self.is_reverse = True
-        e.control.text = "Pause" if self.is_playing else "Play Backward"
-        e.control.update()
-        
-        if self.is_playing:
-            threading.Thread(target=self.play_sequence, daemon=True).start()
+        self.send("toggle", -1)
 
     def next_button_clicked(self, e):
-        if self.current_index < len(self.list_of_magiccube) - 1:
-            self.current_index += 1
-            self.update_visualization(self.list_of_magiccube[self.current_index])
+        self.send("step", 1)
 
     def prev_button_clicked(self, e):
-        if self.current_index > 0:
-            self.current_index -= 1
-            self.update_visualization(self.list_of_magiccube[self.current_index])
+        self.send("step", -1)
 
     def reset_button_clicked(self, e):
-        self.is_playing = False
-        self.is_reverse = False
-        self.current_index = 0
-        self.play_button.text = "Play Forward"
-        self.playback_button.text = "Play Backward"
-        self.play_button.update()
-        self.playback_button.update()
-        self.progress_slider.value = 0
-        self.progress_slider.update()
-        self.update_visualization(self.list_of_magiccube[self.current_index])
+        self.send("reset")
 
     def speed_changed(self, e):
-        self.speed = float(e.control.value)
-        self.speed_information.value = f"Speed: {self.speed:.1f}s"
-        self.speed_information.update()
+        self.send("speed", 10 ** float(e.control.value))
+
+    def speed_label(self):
+        if self.speed < 10:
+            return f"Speed: {self.speed:.1f} states/s"
+        return f"Speed: {self.speed:,.0f} states/s"
 
     def main(self, page: ft.Page):
         self.page = page
@@ -274,12 +418,12 @@ class Visualizer:
             "Load File",
             icon=ft.icons.UPLOAD_FILE,
             on_click=lambda _: self.pick_files_dialog.pick_files(
-                allow_multiple=False,
-                allowed_extensions=["txt"]
+                allow_multiple=self.allow_multiple,
+                allowed_extensions=self.extensions
             )
         )
         
-        file_section = ft.Row(
+        self.file_section = ft.Row(
             controls=[
                 load_file_button,
                 self.file_path_text
@@ -316,6 +460,7 @@ class Visualizer:
             width=200 * 5,
             height=200,
         )
+        self.build_layer()
         
         # Progress slider
         self.progress_slider = ft.Slider(
@@ -328,12 +473,61 @@ class Visualizer:
             disabled=True
         )
         
+        # Value timeline above the slider; a tap seeks to that point
+        self.timeline_cursor = cv.Line(0, 0, 0, TIMELINE_HEIGHT,
+                                       paint=ft.Paint(color=ft.colors.BLACK, stroke_width=1))
+        self.timeline_canvas = cv.Canvas(
+            shapes=[self.timeline_cursor],
+            width=TIMELINE_WIDTH,
+            height=TIMELINE_HEIGHT
+        )
+        timeline = ft.GestureDetector(
+            content=self.timeline_canvas,
+            on_tap_down=self.timeline_clicked
+        )
+        
         progress_container = ft.Container(
-            content=self.progress_slider,
+            content=ft.Column(
+                controls=[timeline, self.progress_slider],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=0
+            ),
             padding=ft.padding.symmetric(horizontal=20),
             width=600
         )
         
+        # Event index: improvements, reheats, restarts, sideways moves, plateaus
+        self.event_dropdown = ft.Dropdown(
+            width=320,
+            hint_text="Jump to event",
+            options=[],
+            on_change=self.event_selected,
+            disabled=True
+        )
+        
+        self.prev_event_button = ft.IconButton(
+            icon=ft.icons.SKIP_PREVIOUS,
+            tooltip="Previous event",
+            on_click=lambda _: self.send("event", -1),
+            disabled=True
+        )
+        
+        self.next_event_button = ft.IconButton(
+            icon=ft.icons.SKIP_NEXT,
+            tooltip="Next event",
+            on_click=lambda _: self.send("event", 1),
+            disabled=True
+        )
+        
+        events = ft.Row(
+            controls=[
+                self.prev_event_button,
+                self.event_dropdown,
+                self.next_event_button,
+            ],
+            alignment=ft.MainAxisAlignment.CENTER
+        )
+        
         # Nav button
         self.prev_button = ft.IconButton(
             icon=ft.icons.ARROW_BACK,
@@ -365,13 +559,13 @@ class Visualizer:
             disabled=True
         )
         
-        self.speed_information = ft.Text(f" Playing Speed: {self.speed:.1f}s")
+        self.speed_information = ft.Text(self.speed_label())
+        # log10 of states per second: 0.3 to 100,000 states/s
         speed_slider = ft.Slider(
-            min=0.1,
-            max=2.0,
-            value=self.speed,
-            divisions=19,
-            label="{value}s",
+            min=-0.5,
+            max=5.0,
+            value=0.0,
+            divisions=22,
             on_change=self.speed_changed
         )
         
@@ -415,11 +609,12 @@ class Visualizer:
         content = ft.Column(
             controls=[
                 title,
-                file_section,
+                self.file_section,
                 self.iteration_information,
                 self.value_information,
                 self.layer,
                 progress_container,
+                events,
                 navigation,
                 controls,
                 anim_speed,
@@ -432,4 +627,132 @@ class Visualizer:
         page.add(content)
 
     def visualize(self):
-        ft.app(target=self.main)
\ No newline at end of file
+        ft.app(target=self.main)
+
+class ComparisonVisualizer(Visualizer):
+    # Plays several .traj files in sync on one Comparison axis: each run gets
+    # a row of smaller faces and its own color on the overlaid value timeline
+    allow_multiple = True
+    extensions = ["traj"]
+    cube_size = 150
+    label_width = 170
+
+    def __init__(self, paths=(), sync="progress", fps=30):
+        super().__init__(fps)
+        self.paths = list(paths)
+        self.sync = sync
+        self.curves = []
+        self.labels = []
+
+    def read_file(self, filenames):
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        try:
+            comparison = Comparison([resolve(filename) for filename in filenames], self.sync)
+        except FileNotFoundError as e:
+            if self.page:
+                self.show_error_dialog(f"File {e.filename} not found")
+            return False
+        except Exception as e:
+            if self.page:
+                self.show_error_dialog(f"Error occurred: {str(e)}")
+            return False
+
+        if isinstance(self.list_of_magiccube, Comparison):
+            self.list_of_magiccube.close()
+        self.list_of_magiccube = comparison
+        self.paths = list(filenames)
+        if self.page:
+            self.build_layer()
+            self.page.update(self.layer)
+        return self.on_file_loaded(", ".join(comparison.names))
+
+    def pick_files_result(self, e: ft.FilePickerResultEvent):
+        if e.files:
+            self.open([file.path for file in e.files])
+
+    def sync_changed(self, e):
+        with self.lock:
+            self.sync = e.control.value
+            if isinstance(self.list_of_magiccube, Comparison):
+                # Both modes share the same ticks, so the position is kept
+                self.list_of_magiccube.sync = self.sync
+                self.timeline = self.make_timeline()
+                self.draw_timeline()
+                self.render(self.timeline_canvas, self.event_dropdown,
+                            self.prev_event_button, self.next_event_button)
+
+    def make_timeline(self):
+        self.curves, timeline = self.list_of_magiccube.curves(TIMELINE_WIDTH)
+        return timeline
+
+    def timeline_shapes(self):
+        # One polyline per run through the best value of each bucket
+        scale = TIMELINE_HEIGHT / 109
+        shapes = []
+        for n, curve in enumerate(self.curves):
+            paint = ft.Paint(color=RUN_COLORS[n % len(RUN_COLORS)], stroke_width=1)
+            points = [(self.timeline_x(tick), TIMELINE_HEIGHT - value * scale) for tick, value in curve]
+            shapes.extend(cv.Line(x1, y1, x2, y2, paint=paint)
+                          for (x1, y1), (x2, y2) in zip(points, points[1:]))
+        return shapes
+
+    def build_layer(self):
+        # A label and five faces per run, created once per set of files
+        row_height = self.cube_size + 10
+        controls = []
+        self.cells = []
+        self.labels = []
+        for n in range(len(self.paths)):
+            label = ft.Text("", left=0, top=n * row_height, width=self.label_width,
+                            size=13, weight=ft.FontWeight.BOLD, color=RUN_COLORS[n % len(RUN_COLORS)])
+            controls.append(label)
+            self.labels.append(label)
+            for i in range(5):
+                face, texts = self.create_face(self.label_width + self.cube_size * i, n * row_height,
+                                               LAYER_COLORS[i], self.cube_size)
+                controls.append(face)
+                self.cells.extend(text for row in texts for text in row)
+        self.shown = [None] * len(self.cells)
+        self.layer.width = self.label_width + self.cube_size * 5
+        self.layer.height = max(1, len(self.paths)) * row_height
+        self.layer.controls = controls
+
+    def update_visualization(self, frame, *controls):
+        if not self.page:
+            return
+
+        comparison = self.list_of_magiccube
+        changed = self.show_cells([value for _, cells, _ in frame for value in cells])
+        for label, name, reader, (index, _, value) in zip(self.labels, comparison.names,
+                                                           comparison.readers, frame):
+            label.value = f"{name}\n{index + 1}/{len(reader)}\nValue: {value}"
+
+        fraction = comparison.fraction(self.current_index)
+        if comparison.sync == "progress":
+            self.iteration_information.value = f"Progress: {fraction:.1%}"
+        else:
+            self.iteration_information.value = (f"Time: {fraction * comparison.duration:.2f} s"
+                                                f" / {comparison.duration:.2f} s")
+        self.value_information.value = "Values: " + " | ".join(str(value) for _, _, value in frame)
+
+        self.prev_button.disabled = self.current_index <= 0
+        self.next_button.disabled = self.current_index >= len(comparison) - 1
+
+        self.page.update(*changed, *self.labels, self.iteration_information, self.value_information,
+                         self.prev_button, self.next_button, *controls)
+
+    def main(self, page: ft.Page):
+        super().main(page)
+        page.title = "Magic Cube Trajectory Comparison"
+        sync_dropdown = ft.Dropdown(
+            width=160,
+            label="Sync by",
+            value=self.sync,
+            options=[ft.dropdown.Option(mode) for mode in SYNC_MODES],
+            on_change=self.sync_changed
+        )
+        self.file_section.controls.append(sync_dropdown)
+        page.update()
+        if self.paths:
+            self.open(self.paths)